@@ -0,0 +1,210 @@
+print("Starting ASGI AI Server...")
+import time
+STARTED = time.perf_counter()
+import asyncio
+import json
+import logging
+import os
+from urllib.parse import parse_qs
+
+import httpx
+from dotenv import load_dotenv
+
+# Load .env before the local modules read their configuration
+load_dotenv()
+
+from logs import configure_logging
+from metrics import CONTENT_TYPE, REGISTRY
+from singleflight import AsyncSingleFlight
+from backends import openai_complete_async
+from service import BATCH_MAX_WORKERS, Service, batch_response
+from classifier import CHAT_COMPLETIONS_URL, MODEL, UPSTREAM_BASE_URL, UpstreamError, fallback
+
+configure_logging()
+logger = logging.getLogger(__name__)
+
+# Get API key
+GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+print("Loaded API key:", "configured" if GROQ_API_KEY else "Not found")
+
+# Upstream connection pool and per-request deadline
+POOL_SIZE = int(os.getenv("ASGI_POOL_SIZE", 20))
+REQUEST_DEADLINE_SECONDS = float(os.getenv("CLASSIFY_DEADLINE_SECONDS", 10))
+
+# Shared keep-alive client to the provider; the serving loop is set on lifespan startup
+http_client = httpx.AsyncClient(
+    limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE),
+    timeout=httpx.Timeout(REQUEST_DEADLINE_SECONDS),
+    headers={"Authorization": f"Bearer {GROQ_API_KEY}"},
+)
+complete = openai_complete_async("Groq", http_client, CHAT_COMPLETIONS_URL, MODEL)
+event_loop = None
+
+
+def preconnect():
+    """Open a keep-alive connection to the provider so the first classification skips TLS setup."""
+    # Any HTTP answer will do; only the pooled connection matters
+    asyncio.run_coroutine_threadsafe(http_client.get(f"{UPSTREAM_BASE_URL}/openai/v1/models"), event_loop).result()
+
+
+# Background job workers hand each job back to the event loop; warm-up starts once serving
+service = Service(
+    AsyncSingleFlight(),
+    complete=complete if GROQ_API_KEY else None,
+    preconnect=preconnect if GROQ_API_KEY else None,
+    run_job=lambda description, fir_id: asyncio.run_coroutine_threadsafe(
+        classify_description(description, fir_id), event_loop).result(),
+    started=STARTED,
+    async_client=True,
+    timeout=REQUEST_DEADLINE_SECONDS,
+    pool_size=POOL_SIZE,
+)
+
+
+async def classify_description(description, fir_id=None):
+    try:
+        return await asyncio.wait_for(
+            service.classify_async(description, fir_id),
+            timeout=REQUEST_DEADLINE_SECONDS,
+        )
+    except asyncio.TimeoutError:
+        return fallback(description, service.fast_path, UpstreamError("AI classification timed out"))
+
+
+async def classify_batch_async(descriptions):
+    """Async counterpart of classifier.classify_batch, bounded by a semaphore."""
+    semaphore = asyncio.Semaphore(BATCH_MAX_WORKERS)
+
+    async def run(index, description):
+        if not isinstance(description, str) or not description:
+            return {"index": index, "error": "No description provided"}
+        async with semaphore:
+            try:
+                return {"index": index, **await classify_description(description)}
+            except Exception as e:
+                logger.warning("Error classifying batch item %d: %s", index, e)
+                return {"index": index, "error": str(e)}
+
+    return await asyncio.gather(*(run(i, d) for i, d in enumerate(descriptions)))
+
+
+async def health_check(body, query):
+    return service.health(api_key_configured=bool(GROQ_API_KEY))
+
+
+async def liveness(body, query):
+    return 200, {"status": "ok"}
+
+
+async def readiness(body, query):
+    return service.readiness()
+
+
+async def metrics(body, query):
+    return 200, REGISTRY.render()
+
+
+async def classify_fir(body, query):
+    answered = service.check_classify(body, query)
+    if answered:
+        return answered
+
+    try:
+        return 200, await classify_description(body["incidentDescription"], body.get("firId"))
+    except Exception as e:
+        logger.error("Error in AI classification: %s", e)
+        return 500, {"error": str(e)}
+
+
+async def classify_fir_batch(body, query):
+    answered = service.check_batch(body)
+    if answered:
+        return answered
+    return batch_response(await classify_batch_async(body["incidentDescriptions"]))
+
+
+ROUTES = {
+    ("GET", "/"): health_check,
+    ("GET", "/healthz"): liveness,
+    ("GET", "/ready"): readiness,
+    ("GET", "/metrics"): metrics,
+    ("POST", "/classify"): classify_fir,
+    ("POST", "/classify/batch"): classify_fir_batch,
+}
+
+CORS_HEADERS = [
+    (b"access-control-allow-origin", b"*"),
+    (b"access-control-allow-headers", b"Content-Type"),
+    (b"access-control-allow-methods", b"GET, POST, OPTIONS"),
+]
+
+
+async def read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            return b"".join(chunks)
+
+
+async def send_response(send, status, data, extra_headers=None):
+    if isinstance(data, str):
+        body, content_type = data.encode("utf-8"), CONTENT_TYPE.encode()
+    else:
+        body, content_type = json.dumps(data).encode("utf-8"), b"application/json"
+    headers = [(b"content-type", content_type), (b"content-length", str(len(body)).encode())]
+    await send({"type": "http.response.start", "status": status,
+                "headers": headers + CORS_HEADERS + [(k.lower().encode(), v.encode()) for k, v in (extra_headers or {}).items()]})
+    await send({"type": "http.response.body", "body": body})
+
+
+async def lifespan(receive, send):
+    global event_loop
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            event_loop = asyncio.get_running_loop()
+            await send({"type": "lifespan.startup.complete"})
+            service.warm_up.start()
+        elif message["type"] == "lifespan.shutdown":
+            await http_client.aclose()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "lifespan":
+        return await lifespan(receive, send)
+
+    method, path = scope["method"], scope["path"]
+    if method == "OPTIONS":
+        await send({"type": "http.response.start", "status": 204, "headers": CORS_HEADERS})
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    if method == "GET" and path.startswith("/jobs/"):
+        return await send_response(send, *service.get_job(path[len("/jobs/"):]))
+
+    handler = ROUTES.get((method, path))
+    if handler is None:
+        return await send_response(send, 404, {"error": "Not found"})
+
+    raw = await read_body(receive)
+    try:
+        body = json.loads(raw) if raw else {}
+    except ValueError:
+        return await send_response(send, 400, {"error": "Invalid JSON body"})
+    if not isinstance(body, dict):
+        return await send_response(send, 400, {"error": "Invalid JSON body"})
+
+    query = {k: v[-1] for k, v in parse_qs(scope.get("query_string", b"").decode()).items()}
+    await send_response(send, *await handler(body, query))
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    port = int(os.getenv("PORT", 5050))
+    print(f"Starting ASGI AI server on port {port}")
+    uvicorn.run(app, host="0.0.0.0", port=port)
@@ -0,0 +1,350 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from classifier import UpstreamError
+from resilience import UpstreamGuard, parse_retry_after
+
+logger = logging.getLogger(__name__)
+
+PRIORITY_WORDS = ("high", "medium", "low")
+
+
+def is_valid_response(content):
+    return isinstance(content, str) and any(word in content.lower() for word in PRIORITY_WORDS)
+
+
+class Backend:
+    """One OpenAI-compatible endpoint/model with its own guard and latency window."""
+
+    def __init__(self, name, complete, guard, model=None, window=200):
+        self.name = name
+        self.complete = complete
+        self.guard = guard
+        self.model = model
+        self.wins = 0
+        self.failures = 0
+        self._latencies = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, latency):
+        with self._lock:
+            self._latencies.append(latency)
+
+    def record(self, won=False, failed=False):
+        with self._lock:
+            self.wins += won
+            self.failures += failed
+
+    def sample_count(self):
+        with self._lock:
+            return len(self._latencies)
+
+    def percentile(self, fraction):
+        with self._lock:
+            if not self._latencies:
+                return None
+            ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def healthy(self):
+        return self.guard.breaker.available()
+
+    def recovering(self):
+        """Open or half-open but due a probe call."""
+        return self.guard.breaker.stats()["state"] != "closed" and self.healthy()
+
+    def stats(self):
+        p50, p95 = self.percentile(0.5), self.percentile(0.95)
+        return {
+            "name": self.name,
+            "model": self.model,
+            "samples": self.sample_count(),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "wins": self.wins,
+            "failures": self.failures,
+            **self.guard.stats(),
+        }
+
+
+class Router:
+    """Routes each call to the fastest healthy backend and hedges slow ones.
+
+    If the chosen backend has not answered within its `hedge_percentile`
+    latency (clamped to [min_delay, max_delay]), the next backend is tried
+    as well and the first valid answer wins. The delay is timed from when
+    the attempt starts running, not from when it was queued for a worker.
+    Hedges are capped at `max_hedge_ratio` of calls so a slow period
+    can't double upstream traffic. A failing backend fails over to the
+    next one immediately.
+    """
+
+    def __init__(self, backends=(), hedge_percentile=0.95, min_delay=0.05, max_delay=2.0,
+                 min_samples=20, pool_size=32, max_hedge_ratio=0.1):
+        self.backends = list(backends)
+        self.hedge_percentile = hedge_percentile
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.max_hedge_ratio = max_hedge_ratio
+        self.calls = 0
+        self.hedges = 0
+        self.hedges_skipped = 0
+        self._pool_size = pool_size
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            hedge_percentile=float(os.getenv("HEDGE_PERCENTILE", 0.95)),
+            min_delay=float(os.getenv("HEDGE_MIN_DELAY_MS", 50)) / 1000,
+            max_delay=float(os.getenv("HEDGE_MAX_DELAY_MS", 2000)) / 1000,
+            pool_size=int(os.getenv("HEDGE_POOL_SIZE", 32)),
+            max_hedge_ratio=float(os.getenv("HEDGE_MAX_RATIO", 0.1)),
+        )
+
+    def add(self, backend):
+        self.backends.append(backend)
+
+    def order(self):
+        """Healthy backends fastest first (registration order until measured).
+
+        A backend whose breaker is due a probe goes first so it can close
+        again; if the probe fails the call fails over or hedges as usual.
+        """
+        healthy = [b for b in self.backends if b.healthy()] or self.backends
+
+        def speed(indexed):
+            index, backend = indexed
+            p50 = backend.percentile(0.5)
+            return (not backend.recovering(), p50 is None, p50 if p50 is not None else index)
+
+        return [backend for _, backend in sorted(enumerate(healthy), key=speed)]
+
+    def hedge_delay(self, backend):
+        if backend.sample_count() < self.min_samples:
+            return self.max_delay
+        return min(self.max_delay, max(self.min_delay, backend.percentile(self.hedge_percentile)))
+
+    def _attempt(self, backend, prompt):
+        start = time.perf_counter()
+        try:
+            content = backend.guard.call(backend.complete, prompt)
+            if not is_valid_response(content):
+                raise UpstreamError(f"Unrecognized response from {backend.name}: {content!r}")
+        except Exception:
+            backend.record(failed=True)
+            raise
+        backend.observe(time.perf_counter() - start)
+        return backend, content
+
+    async def _attempt_async(self, backend, prompt):
+        start = time.perf_counter()
+        try:
+            content = await backend.guard.call_async(backend.complete, prompt)
+            if not is_valid_response(content):
+                raise UpstreamError(f"Unrecognized response from {backend.name}: {content!r}")
+        except Exception:
+            backend.record(failed=True)
+            raise
+        backend.observe(time.perf_counter() - start)
+        return backend, content
+
+    def _started(self):
+        with self._lock:
+            self.calls += 1
+
+    def _hedge(self, backend):
+        """Count a hedge to `backend`, or return False when the hedge budget is spent."""
+        with self._lock:
+            if self.hedges + 1 > self.max_hedge_ratio * self.calls:
+                self.hedges_skipped += 1
+                return False
+            self.hedges += 1
+        logger.info("Hedging to backend %s", backend.name)
+        return True
+
+    def _submit(self, pool, backend, prompt):
+        """Submit an attempt, returning once a worker has picked it up so queueing isn't timed."""
+        started = threading.Event()
+
+        def attempt():
+            started.set()
+            return self._attempt(backend, prompt)
+
+        future = pool.submit(attempt)
+        started.wait()
+        return future
+
+    def call(self, prompt):
+        candidates = self.order()
+        if not candidates:
+            raise UpstreamError("No AI provider configured")
+        self._started()
+        if len(candidates) == 1:
+            backend, content = self._attempt(candidates[0], prompt)
+            backend.record(won=True)
+            return content
+
+        pool = self._executor()
+        delay = self.hedge_delay(candidates[0])
+        remaining = candidates[1:]
+        pending = {self._submit(pool, candidates[0], prompt)}
+        error = None
+        while pending:
+            done, pending = wait(pending, timeout=delay if remaining else None, return_when=FIRST_COMPLETED)
+            if not done:
+                if self._hedge(remaining[0]):
+                    pending.add(self._submit(pool, remaining.pop(0), prompt))
+                else:
+                    delay = None
+                continue
+            for future in done:
+                try:
+                    backend, content = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                backend.record(won=True)
+                return content
+            if remaining and not pending:
+                pending.add(self._submit(pool, remaining.pop(0), prompt))
+        raise error
+
+    async def call_async(self, prompt):
+        candidates = self.order()
+        if not candidates:
+            raise UpstreamError("No AI provider configured")
+        self._started()
+        if len(candidates) == 1:
+            backend, content = await self._attempt_async(candidates[0], prompt)
+            backend.record(won=True)
+            return content
+
+        delay = self.hedge_delay(candidates[0])
+        remaining = candidates[1:]
+        pending = {asyncio.ensure_future(self._attempt_async(candidates[0], prompt))}
+        error = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, timeout=delay if remaining else None,
+                                                   return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if self._hedge(remaining[0]):
+                        pending.add(asyncio.ensure_future(self._attempt_async(remaining.pop(0), prompt)))
+                    else:
+                        delay = None
+                    continue
+                for task in done:
+                    try:
+                        backend, content = task.result()
+                    except Exception as e:
+                        error = e
+                        continue
+                    backend.record(won=True)
+                    return content
+                if remaining and not pending:
+                    pending.add(asyncio.ensure_future(self._attempt_async(remaining.pop(0), prompt)))
+            raise error
+        finally:
+            # The losing hedge is no longer needed
+            for task in pending:
+                task.cancel()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._pool_size, thread_name_prefix="hedge")
+            return self._pool
+
+    def stats(self):
+        return {"calls": self.calls, "hedges": self.hedges, "hedges_skipped": self.hedges_skipped,
+                "max_hedge_ratio": self.max_hedge_ratio, "backends": [backend.stats() for backend in self.backends]}
+
+
+def openai_payload(model, prompt):
+    return {
+        "model": model,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0,
+        "max_tokens": 10,
+    }
+
+
+def _check_response(name, response):
+    if response.status_code != 200:
+        logger.warning("%s API error: %s - %s", name, response.status_code, response.text)
+        raise UpstreamError(f"{name} API error: {response.status_code}", status=response.status_code,
+                            retry_after=parse_retry_after(response.headers.get("Retry-After")))
+    try:
+        return response.json()["choices"][0]["message"]["content"]
+    except (ValueError, LookupError, TypeError) as e:
+        logger.warning("%s returned a malformed body: %s", name, response.text[:200])
+        raise UpstreamError(f"{name} returned a malformed response") from e
+
+
+def openai_complete(name, client, url, model):
+    """`complete(prompt)` for an OpenAI-compatible endpoint over a sync httpx client."""
+    import httpx
+
+    def complete(prompt):
+        try:
+            response = client.post(url, json=openai_payload(model, prompt))
+        except httpx.HTTPError as e:
+            raise UpstreamError(f"Network error connecting to {name}") from e
+        return _check_response(name, response)
+    return complete
+
+
+def openai_complete_async(name, client, url, model):
+    """Async `complete(prompt)` for an OpenAI-compatible endpoint over an httpx.AsyncClient."""
+    import httpx
+
+    async def complete(prompt):
+        try:
+            response = await client.post(url, json=openai_payload(model, prompt))
+        except httpx.HTTPError as e:
+            raise UpstreamError(f"Network error connecting to {name}") from e
+        return _check_response(name, response)
+    return complete
+
+
+def configured_backends():
+    """Extra backends from LLM_BACKENDS, a JSON list of objects with
+    "name", "url" (full chat completions URL), "model" and optionally
+    "api_key_env" naming the environment variable holding its key.
+    """
+    raw = os.getenv("LLM_BACKENDS")
+    if not raw:
+        return []
+    specs = json.loads(raw)
+    for spec in specs:
+        spec["api_key"] = os.getenv(spec.get("api_key_env", ""), "") if spec.get("api_key_env") else ""
+    return specs
+
+
+def add_configured_backends(router, async_client=False, timeout=30, pool_size=20):
+    """Register LLM_BACKENDS on `router`, each with its own keep-alive client and guard."""
+    specs = configured_backends()
+    if not specs:
+        return
+    import httpx  # deferred so servers without extra backends don't pay for it at startup
+
+    for spec in specs:
+        options = dict(
+            headers={"Authorization": f"Bearer {spec['api_key']}"} if spec["api_key"] else {},
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+        if async_client:
+            complete = openai_complete_async(spec["name"], httpx.AsyncClient(**options), spec["url"], spec["model"])
+        else:
+            complete = openai_complete(spec["name"], httpx.Client(**options), spec["url"], spec["model"])
+        router.add(Backend(spec["name"], complete, UpstreamGuard.from_env(name=spec["name"]), model=spec["model"]))
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from sqlite_writer import SQLiteWriter
+
+
+def make_key(description, model, prompt_version):
+    """Content address for a classification: normalized text + model + prompt."""
+    normalized = " ".join(description.split()).casefold()
+    material = f"{model}\x00{prompt_version}\x00{normalized}"
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class ClassificationCache:
+    """In-memory LRU with TTL, optionally backed by a SQLite file.
+
+    The SQLite tier survives restarts; entries read from it are promoted
+    into the memory tier. Writes to it are committed in the background.
+    """
+
+    def __init__(self, max_entries=1024, ttl_seconds=86400, db_path=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.db_path = db_path
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._writer = None
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS classifications "
+                "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            self._db.execute("DELETE FROM classifications WHERE expires_at <= ?", (time.time(),))
+            self._db.commit()
+            self._writer = SQLiteWriter(db_path)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_entries=int(os.getenv("CACHE_MAX_ENTRIES", 1024)),
+            ttl_seconds=float(os.getenv("CACHE_TTL_SECONDS", 86400)),
+            db_path=os.getenv("CACHE_DB_PATH") or None,
+        )
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return dict(value)
+                del self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM classifications WHERE key = ? AND expires_at > ?",
+                    (key, now),
+                ).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._remember(key, value, row[1])
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return dict(value)
+
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        expires_at = time.time() + self.ttl_seconds
+        with self._lock:
+            self._remember(key, dict(value), expires_at)
+        if self._writer is not None:
+            self._writer.execute(
+                "INSERT OR REPLACE INTO classifications (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at),
+            )
+
+    def flush(self):
+        """Block until queued SQLite writes are committed."""
+        if self._writer is not None:
+            self._writer.flush()
+
+    def preload(self):
+        """Promote the newest unexpired SQLite entries into the memory tier."""
+        if self._db is None:
+            return 0
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, value, expires_at FROM classifications WHERE expires_at > ? "
+                "ORDER BY expires_at DESC LIMIT ?",
+                (time.time(), self.max_entries),
+            ).fetchall()
+            for key, value, expires_at in reversed(rows):
+                if key not in self._entries:
+                    self._remember(key, json.loads(value), expires_at)
+        return len(rows)
+
+    def _remember(self, key, value, expires_at):
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "persistent": self._db is not None,
+                "pending_writes": self._writer.pending() if self._writer is not None else 0,
+            }
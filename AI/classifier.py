@@ -0,0 +1,284 @@
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from cache import make_key
+from preprocess import Prepared
+from metrics import (CLASSIFICATIONS, CLASSIFY_LATENCY, DESCRIPTION_TOKENS, DESCRIPTIONS_SHORTENED, IN_FLIGHT,
+                     PARSE_LATENCY, PRIORITIES)
+
+logger = logging.getLogger(__name__)
+
+# OpenAI-compatible provider; point GROQ_BASE_URL at AI/mock_upstream.py to run offline.
+MODEL = os.getenv("GROQ_MODEL", "llama3-8b-8192")
+UPSTREAM_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com").rstrip("/")
+CHAT_COMPLETIONS_URL = f"{UPSTREAM_BASE_URL}/openai/v1/chat/completions"
+
+# Bump whenever PROMPT_TEMPLATE changes so cached results are not reused.
+PROMPT_VERSION = "1"
+
+PROMPT_TEMPLATE = """You are a crime analysis assistant.
+
+Your job is to classify an FIR description into one of the following categories:
+- High: Life-threatening crimes such as murder, rape, terrorism, serious assault, bomb threats
+- Medium: Significant crimes like robbery, theft, hacking, fraud
+- Low: Minor issues such as lost items, noise complaints, or littering
+
+Only respond with a single word: High, Medium, or Low.
+
+FIR Description: {description}
+Priority:"""
+
+
+class UpstreamError(Exception):
+    """Raised when the LLM provider fails or returns an unusable response.
+
+    `status` is the provider's HTTP status (None for network errors) and
+    `retry_after` its Retry-After hint in seconds, when it sent one.
+    """
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def build_prompt(description):
+    return PROMPT_TEMPLATE.format(description=description)
+
+
+def parse_priority(content):
+    priority = content.strip().lower()
+
+    if "high" in priority:
+        return "high"
+    elif "medium" in priority:
+        return "medium"
+    elif "low" in priority:
+        return "low"
+    return "low"
+
+
+def classify(description, complete, cache=None, fast_path=None, flight=None, index=None, fir_id=None,
+             preprocessor=None):
+    """Classify one description, using `complete(prompt) -> str` for the LLM call.
+
+    A confident fast-path match, a cache hit or a near-duplicate in
+    `index` that may lend its priority skips the LLM. When `complete` is None (no provider
+    configured) or raises UpstreamError, the fast path answers instead.
+    With a SingleFlight, concurrent identical descriptions share one call.
+    With an index, FIR IDs of near-duplicate filings come back as
+    "duplicates" and `fir_id` is remembered for later ones. A
+    preprocessor cleans the text and bounds its tokens before it is
+    cached and sent upstream.
+    """
+    start = _started()
+    result = None
+    try:
+        prepared, match = _match(description, index, preprocessor)
+        result = _indexed(_classify(description, prepared, complete, cache, fast_path, flight, match, preprocessor),
+                          index, match, fir_id)
+    finally:
+        _record(start, result)
+    return result
+
+
+async def classify_async(description, complete, cache=None, fast_path=None, flight=None, index=None, fir_id=None,
+                         preprocessor=None):
+    """Same as classify(), for an awaitable `complete(prompt)` and an AsyncSingleFlight.
+
+    A request cancelled by its deadline is recorded with outcome "cancelled".
+    """
+    start = _started()
+    result, outcome = None, "error"
+    try:
+        prepared, match = _match(description, index, preprocessor)
+        result = _indexed(await _classify_async(description, prepared, complete, cache, fast_path, flight, match,
+                                                preprocessor),
+                          index, match, fir_id)
+    except asyncio.CancelledError:
+        outcome = "cancelled"
+        raise
+    finally:
+        _record(start, result, outcome)
+    return result
+
+
+def _started():
+    IN_FLIGHT.inc()
+    return time.perf_counter()
+
+
+def _record(start, result, outcome="error"):
+    """Record a finished classification; `outcome` labels one that produced no result."""
+    elapsed = time.perf_counter() - start
+    IN_FLIGHT.dec()
+    CLASSIFY_LATENCY.observe(elapsed)
+    if result is None:
+        CLASSIFICATIONS.inc(outcome=outcome)
+        return
+    CLASSIFICATIONS.inc(outcome=result["tier"])
+    PRIORITIES.inc(priority=result["priority"])
+    logger.info("classified", extra={"fields": {
+        "priority": result["priority"], "tier": result["tier"],
+        "coalesced": result.get("coalesced", False), "duration_ms": round(elapsed * 1000, 2),
+    }})
+
+
+def _parse(content):
+    logger.debug("AI response", extra={"fields": {"content": content}})
+    with PARSE_LATENCY.time():
+        return parse_priority(content)
+
+
+def _classify(description, prepared, complete, cache, fast_path, flight, match, preprocessor):
+    local = _local(description, fast_path, offline=complete is None)
+    if local is not None:
+        return local
+
+    prepared = prepared or _prepare(description, preprocessor)
+    key, cached = _lookup(prepared.text, cache)
+    if cached is not None:
+        return cached
+    if match is not None and match.priority is not None:
+        return {"priority": match.priority, "tier": "near_duplicate", "similarity": match.similarity}
+
+    def call():
+        _submitted(prepared)
+        priority = _parse(complete(build_prompt(prepared.text)))
+        return _finish(priority, cache, key)
+
+    try:
+        if flight is None:
+            return call()
+        result, shared = flight.do(key, call)
+    except UpstreamError as e:
+        return fallback(description, fast_path, e)
+    return {**result, "coalesced": True} if shared else result
+
+
+async def _classify_async(description, prepared, complete, cache, fast_path, flight, match, preprocessor):
+    local = _local(description, fast_path, offline=complete is None)
+    if local is not None:
+        return local
+
+    prepared = prepared or _prepare(description, preprocessor)
+    key, cached = _lookup(prepared.text, cache)
+    if cached is not None:
+        return cached
+    if match is not None and match.priority is not None:
+        return {"priority": match.priority, "tier": "near_duplicate", "similarity": match.similarity}
+
+    async def call():
+        _submitted(prepared)
+        priority = _parse(await complete(build_prompt(prepared.text)))
+        return _finish(priority, cache, key)
+
+    try:
+        if flight is None:
+            return await call()
+        result, shared = await flight.do(key, call)
+    except UpstreamError as e:
+        return fallback(description, fast_path, e)
+    return {**result, "coalesced": True} if shared else result
+
+
+def fallback(description, fast_path, error):
+    """Answer from the fast path after an upstream failure, or re-raise without one."""
+    if fast_path is None:
+        raise error
+    logger.warning("AI provider unavailable, using local fallback: %s", error)
+    priority, confidence = fast_path.classify(description)
+    return {"priority": priority, "tier": "fallback", "confidence": confidence}
+
+
+def _local(description, fast_path, offline):
+    if fast_path is None:
+        if offline:
+            raise UpstreamError("No AI provider configured")
+        return None
+
+    priority, confidence = fast_path.classify(description)
+    if offline:
+        return {"priority": priority, "tier": "offline", "confidence": confidence}
+    if fast_path.is_confident(priority, confidence):
+        return {"priority": priority, "tier": "fast_path", "confidence": confidence}
+    return None
+
+
+def _match(description, index, preprocessor):
+    """Look the prepared (token-bounded) text up in the index; (None, None) without one."""
+    if index is None:
+        return None, None
+    prepared = _prepare(description, preprocessor)
+    return prepared, index.lookup(prepared.text)
+
+
+def _prepare(description, preprocessor):
+    if preprocessor is None:
+        return Prepared(description, None, None, None)
+    return preprocessor.prepare(description)
+
+
+def _submitted(prepared):
+    """Record the token counts of a description that is about to go upstream."""
+    if prepared.tokens is None:
+        return
+    DESCRIPTION_TOKENS.observe(prepared.original_tokens, stage="original")
+    DESCRIPTION_TOKENS.observe(prepared.tokens, stage="submitted")
+    if prepared.method is not None:
+        DESCRIPTIONS_SHORTENED.inc(method=prepared.method)
+        logger.info("Shortened over-budget description", extra={"fields": {
+            "method": prepared.method, "original_tokens": prepared.original_tokens, "tokens": prepared.tokens}})
+
+
+def _lookup(description, cache):
+    key = make_key(description, MODEL, PROMPT_VERSION)
+    if cache is None:
+        return key, None
+    cached = cache.get(key)
+    if cached is not None:
+        return key, {**cached, "tier": "cache"}
+    return key, None
+
+
+def _indexed(result, index, match, fir_id):
+    """Record the result in the near-duplicate index and attach matching FIR IDs."""
+    if match is None:
+        return result
+    # Only LLM answers are indexed for reuse; local ones (fast path, fallback, offline) just link duplicate filings
+    trusted = result["tier"] in ("llm", "cache", "near_duplicate")
+    index.record(match, result["priority"] if trusted else None, fir_id, reused=result["tier"] == "near_duplicate")
+    duplicates = [d for d in match.duplicates if d != fir_id]
+    return {**result, "duplicates": duplicates} if duplicates else result
+
+
+def _finish(priority, cache, key):
+    result = {"priority": priority, "tier": "llm"}
+    if cache is not None:
+        cache.set(key, result)
+    return result
+
+
+def classify_batch(descriptions, classify_one, max_workers=8):
+    """Run `classify_one` over descriptions on a bounded worker pool.
+
+    Results come back in input order; a failing item carries an "error"
+    instead of failing the whole batch.
+    """
+    def run(index, description):
+        if not isinstance(description, str) or not description:
+            return {"index": index, "error": "No description provided"}
+        try:
+            return {"index": index, **classify_one(description)}
+        except Exception as e:
+            logger.warning("Error classifying batch item %d: %s", index, e)
+            return {"index": index, "error": str(e)}
+
+    if not descriptions:
+        return []
+
+    workers = max(1, min(max_workers, len(descriptions)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(run, range(len(descriptions)), descriptions))
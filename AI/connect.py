@@ -1,87 +1,85 @@
 print("Starting Flask AI Server...")
-from flask import Flask, request, jsonify
-from flask_cors import CORS
+import time
+STARTED = time.perf_counter()
+import logging
 import os
+import threading
 from dotenv import load_dotenv
 
+# Load .env before the local modules read their configuration
 load_dotenv()
 
-# Initialize Flask app first
-app = Flask(__name__)
-CORS(app)
+from logs import configure_logging
+from singleflight import SingleFlight
+from resilience import parse_retry_after
+from service import Service
+from flask_app import create_app
+from classifier import MODEL, UPSTREAM_BASE_URL, UpstreamError
+
+configure_logging()
+logger = logging.getLogger(__name__)
 
 # Get API key
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-print("Loaded API key:", GROQ_API_KEY[:20] + "..." if GROQ_API_KEY else "Not found")
+print("Loaded API key:", "configured" if GROQ_API_KEY else "Not found")
 
-# Initialize Groq client with error handling
+# Groq client, created by warm-up or on first use so the SDK import stays off the cold-start path
 client = None
-try:
-    from groq import Groq
-    client = Groq(api_key=GROQ_API_KEY)
-    print("Groq client initialized successfully")
-except Exception as e:
-    print(f"Error initializing Groq client: {e}")
-    print("Server will start but AI classification will not work")
-
-@app.route('/', methods=['GET'])
-def health_check():
-    return jsonify({"status": "AI service is running", "groq_client": client is not None})
-
-@app.route('/classify', methods=['POST'])
-def classify_fir():
-    if client is None:
-        return jsonify({"error": "Groq client not initialized"}), 500
-        
-    data = request.json
-    description = data.get("incidentDescription", "")
-
-    if not description:
-        return jsonify({"error": "No description provided"}), 400
-    
-    prompt = f"""You are a crime analysis assistant.
-
-Your job is to classify an FIR description into one of the following categories:
-- High: Life-threatening crimes such as murder, rape, terrorism, serious assault, bomb threats
-- Medium: Significant crimes like robbery, theft, hacking, fraud
-- Low: Minor issues such as lost items, noise complaints, or littering
-
-Only respond with a single word: High, Medium, or Low.
-
-FIR Description: {description}
-Priority:"""
-
+client_lock = threading.Lock()
+
+def get_client():
+    global client
+    with client_lock:
+        if client is None:
+            from groq import Groq
+            client = Groq(api_key=GROQ_API_KEY, base_url=UPSTREAM_BASE_URL, max_retries=0)  # retries are owned by the router's guard
+            logger.info("Groq client initialized")
+    return client
+
+def complete(prompt):
     try:
-        response = client.chat.completions.create(
-            model="llama3-8b-8192",
+        response = get_client().chat.completions.create(
+            model=MODEL,
             messages=[{"role": "user", "content": prompt}],
             temperature=0,
             max_tokens=10            
         )
-
-        priority = response.choices[0].message.content.strip()
-        print("AI Response:", response.choices[0].message.content)
-        priority = priority.lower()
-        
-        if "high" in priority:
-            priority = "high"
-        elif "medium" in priority:
-            priority = "medium"
-        elif "low" in priority:
-            priority = "low"
-        else:
-            priority = 'low'
-        
-        print("Prompt sent to AI:\n", prompt)
-        print("Final processed priority:", priority)
-
-        return jsonify({"priority": priority})
     except Exception as e:
-        print(f"Error in AI classification: {e}")
-        return jsonify({"error": str(e)}), 500
+        # groq.APIStatusError carries status_code/response; connection errors carry neither
+        status = getattr(e, "status_code", None)
+        headers = getattr(getattr(e, "response", None), "headers", {})
+        logger.warning("Groq API error: %s", e)
+        raise UpstreamError(f"Groq API error: {status or e}", status=status,
+                            retry_after=parse_retry_after(headers.get("retry-after"))) from e
+
+    try:
+        return response.choices[0].message.content
+    except (IndexError, AttributeError, TypeError) as e:
+        logger.warning("Groq returned a malformed response: %s", response)
+        raise UpstreamError("Groq returned a malformed response") from e
+
+def preconnect():
+    """Open the Groq client's keep-alive connection so the first classification skips TLS setup."""
+    from groq import APIStatusError
+    try:
+        get_client().models.list()
+    except APIStatusError:
+        pass  # any HTTP answer means the connection is up
+
+if not GROQ_API_KEY:
+    print("GROQ_API_KEY not set; server will use local keyword classification only")
+
+service = Service(SingleFlight(), complete=complete if GROQ_API_KEY else None,
+                  preconnect=preconnect if GROQ_API_KEY else None, started=STARTED)
+classify_description = service.classify
+
+app = create_app(service, lambda: {"groq_client": client is not None})
+
+service.warm_up.start()
 
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 5050))
-    app.run(host="0.0.0.0", debug=True, port=port)
+    # The debug reloader imports the app twice, so it is opt-in
+    app.run(host="0.0.0.0", debug=os.getenv("FLASK_DEBUG") == "1", port=port)
 
 
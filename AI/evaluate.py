@@ -0,0 +1,350 @@
+"""Measure accuracy against latency for classifier tiers and LLM backends.
+
+Runs a labeled NDJSON corpus (one FIR per line with "incidentDescription"
+or "description" and a "label" of high/medium/low, or a "severity" of
+3/2/1) through each variant in parallel:
+
+    fast_path      the local keyword classifier alone
+    llm:NAME       every item sent to backend NAME
+    tiered:NAME    the service's tier order: confident fast path, else NAME
+                   (upstream failures count as errors, not as keyword fallbacks)
+
+and reports a confusion matrix, per-class recall, latency percentiles and
+tokens per item, saved as JSON so runs can be compared. Backends come from
+a local stub (default), previously recorded responses, or the live
+providers configured for the service:
+
+    python evaluate.py corpus.ndjson --stub-latency lognormal:0.3,0.5
+    python evaluate.py corpus.ndjson --live --record responses.ndjson
+    python evaluate.py corpus.ndjson --recorded responses.ndjson --compare evaluations/previous.json
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+# Load .env before the local modules read their configuration
+load_dotenv()
+
+from classifier import CHAT_COMPLETIONS_URL, MODEL, PROMPT_VERSION, UpstreamError, classify
+from fast_path import KeywordClassifier
+from preprocess import DescriptionPreprocessor, count_tokens
+
+CLASSES = ("high", "medium", "low")
+SEVERITY_LABELS = {3: "high", 2: "medium", 1: "low"}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def load_corpus(path):
+    """Return (items, skipped) where items are dicts with id, description and label."""
+    items, skipped = [], 0
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            description = record.get("incidentDescription") or record.get("description")
+            label = str(record.get("label") or record.get("expected") or "").lower()
+            if label not in CLASSES:
+                label = SEVERITY_LABELS.get(record.get("severity"))
+            if not description or label is None:
+                skipped += 1
+                continue
+            items.append({"id": record.get("id", line_number), "description": description, "label": label})
+    return items, skipped
+
+
+def prompt_key(model, prompt):
+    return hashlib.sha256(f"{model}\x00{prompt}".encode("utf-8")).hexdigest()
+
+
+class Recorder:
+    """Appends raw backend responses as NDJSON for later offline replay."""
+
+    def __init__(self, path):
+        self._file = open(path, "a", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def wrap(self, name, model, complete):
+        def recorded(prompt):
+            start = time.perf_counter()
+            content = complete(prompt)
+            entry = {"backend": name, "model": model, "prompt_sha": prompt_key(model, prompt),
+                     "content": content, "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+            with self._lock:
+                self._file.write(json.dumps(entry) + "\n")
+                self._file.flush()
+            return content
+        return recorded
+
+    def close(self):
+        self._file.close()
+
+
+def replay_backends(path):
+    """`{name: (model, complete)}` answering from recorded responses, with their recorded latency.
+
+    A prompt that was never recorded (say, after a prompt change) fails
+    like an upstream error and is counted as one.
+    """
+    recorded = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                recorded.setdefault(entry["backend"], (entry["model"], {}))[1][entry["prompt_sha"]] = entry
+
+    def replayer(name, model, responses):
+        def complete(prompt):
+            entry = responses.get(prompt_key(model, prompt))
+            if entry is None:
+                raise UpstreamError(f"No recorded response from {name} for this prompt")
+            time.sleep(entry["latency_ms"] / 1000)
+            return entry["content"]
+        return complete
+
+    return {name: (model, replayer(name, model, responses)) for name, (model, responses) in recorded.items()}
+
+
+def live_backends():
+    """The service's providers: Groq when GROQ_API_KEY is set, plus LLM_BACKENDS."""
+    import httpx
+    from backends import configured_backends, openai_complete
+    from resilience import UpstreamGuard
+
+    specs = configured_backends()
+    api_key = os.getenv("GROQ_API_KEY")
+    if api_key:
+        specs.insert(0, {"name": "groq", "url": CHAT_COMPLETIONS_URL, "model": MODEL, "api_key": api_key})
+
+    backends = {}
+    for spec in specs:
+        headers = {"Authorization": f"Bearer {spec['api_key']}"} if spec["api_key"] else {}
+        complete = openai_complete(spec["name"], httpx.Client(headers=headers, timeout=30), spec["url"], spec["model"])
+        # Stay within the same provider rate limits as the service
+        guard = UpstreamGuard.from_env(name=spec["name"])
+        backends[spec["name"]] = (spec["model"], lambda prompt, guard=guard, complete=complete: guard.call(complete, prompt))
+    return backends
+
+
+def run_variant(variant, items, backends, fast_path, preprocessor, workers):
+    kind, _, name = variant.partition(":")
+    if kind != "fast_path" and name not in backends:
+        raise SystemExit(f"Unknown backend {name!r} for variant {variant}; have {sorted(backends) or 'none'}")
+    complete = backends[name][1] if name else None
+
+    def run(item):
+        prompt_tokens, completion_tokens, unrecognized = [], [], []
+
+        def counted(prompt):
+            prompt_tokens.append(count_tokens(prompt))
+            content = complete(prompt)
+            completion_tokens.append(count_tokens(content))
+            if not any(word in content.lower() for word in CLASSES):
+                unrecognized.append(content)
+            return content
+
+        start = time.perf_counter()
+        try:
+            priority, confidence = fast_path.classify(item["description"])
+            if kind == "fast_path" or (kind == "tiered" and fast_path.is_confident(priority, confidence)):
+                result = {"priority": priority, "tier": "fast_path"}
+            else:
+                # No fast_path here: an upstream failure must count as an error, not a keyword fallback
+                result = classify(item["description"], counted, preprocessor=preprocessor)
+            error = None
+        except Exception as e:
+            result, error = {"priority": None, "tier": None}, str(e)
+        return {
+            "id": item["id"],
+            "label": item["label"],
+            "predicted": result["priority"],
+            "tier": result["tier"],
+            "latency_ms": round((time.perf_counter() - start) * 1000, 2),
+            "prompt_tokens": sum(prompt_tokens),
+            "completion_tokens": sum(completion_tokens),
+            "unrecognized": bool(unrecognized),
+            "error": error,
+        }
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        return list(pool.map(run, items))
+
+
+def summarize(results):
+    confusion = {label: {predicted: 0 for predicted in CLASSES + ("error",)} for label in CLASSES}
+    for r in results:
+        confusion[r["label"]][r["predicted"] or "error"] += 1
+
+    def recall(label):
+        total = sum(confusion[label].values())
+        return round(confusion[label][label] / total, 4) if total else None
+
+    def precision(label):
+        predicted = sum(confusion[row][label] for row in CLASSES)
+        return round(confusion[label][label] / predicted, 4) if predicted else None
+
+    latencies = sorted(r["latency_ms"] for r in results)
+    tiers = {}
+    for r in results:
+        tiers[r["tier"] or "error"] = tiers.get(r["tier"] or "error", 0) + 1
+    count = len(results)
+    return {
+        "items": count,
+        "accuracy": round(sum(confusion[c][c] for c in CLASSES) / count, 4) if count else None,
+        "recall": {c: recall(c) for c in CLASSES},
+        "precision": {c: precision(c) for c in CLASSES},
+        "confusion": confusion,
+        "errors": sum(1 for r in results if r["error"]),
+        "unrecognized_responses": sum(1 for r in results if r["unrecognized"]),
+        "latency_ms": {"p50": percentile(latencies, 0.5), "p95": percentile(latencies, 0.95),
+                       "p99": percentile(latencies, 0.99), "max": latencies[-1] if latencies else None},
+        "tokens_per_item": {
+            "prompt": round(sum(r["prompt_tokens"] for r in results) / count, 1) if count else None,
+            "completion": round(sum(r["completion_tokens"] for r in results) / count, 1) if count else None,
+        },
+        "tiers": tiers,
+    }
+
+
+def print_report(report, previous=None, out=sys.stdout):
+    print(f"{'variant':<20}{'acc':>7}{'R high':>8}{'R med':>8}{'R low':>8}"
+          f"{'p50 ms':>9}{'p95 ms':>9}{'tok/item':>10}{'errors':>8}", file=out)
+    for variant, summary in report["variants"].items():
+        s = summary["summary"]
+        print(f"{variant:<20}{_ratio(s['accuracy']):>7}{_ratio(s['recall']['high']):>8}"
+              f"{_ratio(s['recall']['medium']):>8}{_ratio(s['recall']['low']):>8}"
+              f"{_number(s['latency_ms']['p50']):>9}{_number(s['latency_ms']['p95']):>9}"
+              f"{_number(s['tokens_per_item']['prompt']):>10}{s['errors']:>8}", file=out)
+
+    for variant, summary in report["variants"].items():
+        print(f"\n{variant}: rows expected, columns predicted", file=out)
+        print(f"{'':<8}" + "".join(f"{c:>8}" for c in CLASSES + ("error",)), file=out)
+        for label, row in summary["summary"]["confusion"].items():
+            print(f"{label:<8}" + "".join(f"{row[c]:>8}" for c in CLASSES + ("error",)), file=out)
+
+    if previous is not None:
+        print(f"\nChange since {previous['run']['started_at']}:", file=out)
+        for variant, summary in report["variants"].items():
+            before = previous["variants"].get(variant)
+            if before is None:
+                continue
+            s, b = summary["summary"], before["summary"]
+            print(f"{variant:<20} accuracy {_delta(s['accuracy'], b['accuracy'], '+.3f')}"
+                  f"  high recall {_delta(s['recall']['high'], b['recall']['high'], '+.3f')}"
+                  f"  p95 {_delta(s['latency_ms']['p95'], b['latency_ms']['p95'], '+.1f')} ms"
+                  f"  tokens/item {_delta(s['tokens_per_item']['prompt'], b['tokens_per_item']['prompt'], '+.1f')}",
+                  file=out)
+
+
+def _ratio(value):
+    return "-" if value is None else f"{value:.3f}"
+
+
+def _number(value):
+    return "-" if value is None else f"{value:.1f}"
+
+
+def _delta(now, before, spec):
+    return "n/a" if now is None or before is None else format(now - before, spec)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate classifier accuracy against latency")
+    parser.add_argument("corpus", help="labeled NDJSON corpus")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--stub-latency", default="fixed:0.05",
+                        help="latency of the local stub backend, as for mock_upstream.py (default source)")
+    source.add_argument("--recorded", help="replay responses recorded with --record")
+    source.add_argument("--live", action="store_true", help="call the configured providers")
+    parser.add_argument("--record", help="append raw backend responses here for later --recorded runs")
+    parser.add_argument("--variants", help="comma-separated, e.g. fast_path,llm:groq,tiered:groq "
+                                           "(default: fast_path plus llm: and tiered: for every backend)")
+    parser.add_argument("--workers", type=int, default=8, help="concurrent items per variant")
+    parser.add_argument("--output", help="results JSON (default: evaluations/<timestamp>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to show changes against")
+    args = parser.parse_args()
+
+    items, skipped = load_corpus(args.corpus)
+    if not items:
+        parser.error("corpus has no labeled items")
+    if skipped:
+        print(f"Skipped {skipped} records without a description or label", file=sys.stderr)
+
+    stub = None
+    if args.recorded:
+        backends = replay_backends(args.recorded)
+    elif args.live:
+        backends = live_backends()
+    else:
+        from mock_upstream import MockUpstream
+        stub = MockUpstream(latency=args.stub_latency, seed=0).start()
+        from backends import openai_complete
+        import httpx
+        backends = {"stub": ("mock", openai_complete("stub", httpx.Client(timeout=30),
+                                                     f"{stub.url}/v1/chat/completions", "mock"))}
+
+    recorder = Recorder(args.record) if args.record else None
+    if recorder is not None:
+        backends = {name: (model, recorder.wrap(name, model, complete)) for name, (model, complete) in backends.items()}
+
+    variants = args.variants.split(",") if args.variants else (
+        ["fast_path"] + [f"{kind}:{name}" for name in backends for kind in ("llm", "tiered")])
+    fast_path = KeywordClassifier.from_env()
+    preprocessor = DescriptionPreprocessor.from_env()
+
+    started_at = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    try:
+        # Variants run side by side; each keeps `workers` items in flight
+        with ThreadPoolExecutor(max_workers=len(variants)) as pool:
+            runs = dict(zip(variants, pool.map(
+                lambda v: run_variant(v, items, backends, fast_path, preprocessor, args.workers), variants)))
+    finally:
+        if recorder is not None:
+            recorder.close()
+        if stub is not None:
+            stub.stop()
+
+    report = {
+        "run": {
+            "started_at": started_at,
+            "corpus": os.path.abspath(args.corpus),
+            "items": len(items),
+            "source": "recorded" if args.recorded else "live" if args.live else "stub",
+            "prompt_version": PROMPT_VERSION,
+            "models": {name: model for name, (model, _) in backends.items()},
+            "fast_path_min_confidence": fast_path.min_confidence,
+            "description_max_tokens": preprocessor.max_tokens,
+        },
+        "variants": {variant: {"summary": summarize(results), "items": results} for variant, results in runs.items()},
+    }
+
+    output = args.output or os.path.join("evaluations", started_at.replace(":", "") + ".json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    previous = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            previous = json.load(f)
+    print_report(report, previous)
+    print(f"\nResults written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+import os
+import re
+
+# Mirrors the taxonomy spelled out in classifier.PROMPT_TEMPLATE.
+KEYWORDS = {
+    "high": [
+        r"murder(?:ed|s)?", r"kill(?:ed|ing)?", r"homicide", r"rape[ds]?", r"raping",
+        r"terroris[mt]s?", r"terror attack", r"bomb(?:s|ing)?", r"explosives?",
+        r"(?:serious|grievous|violent) assault", r"stabb?(?:ed|ing)", r"shot dead",
+        r"gunfire", r"shooting", r"kidnapp?(?:ed|ing)?", r"abduct(?:ed|ion)",
+        r"acid attack",
+    ],
+    "medium": [
+        r"robb(?:ery|ed|ers?)", r"theft", r"thie(?:f|ves)", r"stole(?:n)?", r"steal(?:ing)?",
+        r"burglary", r"burgl(?:ed|ar)", r"snatch(?:ed|ing)?", r"hack(?:ed|ing|er)?",
+        r"fraud(?:ulent)?", r"scam(?:med)?", r"phishing", r"extortion", r"embezzle(?:d|ment)",
+    ],
+    "low": [
+        # Phrases only: a bare "lost" or "noise" also appears in violent and financial crimes
+        r"lost (?:my |his |her |our |a )?(?:mobile|phone|wallet|purse|keys?|documents?|licen[cs]e)",
+        r"misplaced", r"noise complaint", r"noisy neighbours?", r"loud music", r"litter(?:ing|ed)?",
+        r"nuisance", r"stray (?:dog|animal)s?",
+    ],
+}
+
+# Harm indicators that don't settle a category on their own but must not differ
+# between two descriptions for one to reuse the other's priority.
+SEVERITY_MARKERS = [
+    r"shot", r"shoot(?:s|ing)?", r"guns?", r"gunpoint", r"pistol", r"firearms?", r"knife", r"knives",
+    r"axe", r"weapons?", r"attack(?:s|ed|ing)?", r"assault(?:s|ed|ing)?", r"beat(?:s|en|ing)?", r"hit",
+    r"injur(?:y|ies|ed)", r"wound(?:s|ed)?", r"blood", r"bleeding", r"unconscious", r"dead", r"death",
+    r"died", r"threat(?:s|en|ened|ening)?", r"sexual(?:ly)?", r"molest(?:ed|ation)?", r"harass(?:ed|ment)?",
+    r"strangl(?:e|ed|ing)", r"poison(?:ed|ing)?", r"burn(?:t|ed|ing)?", r"acid", r"hostage", r"missing",
+    r"suicide", r"child(?:ren)?", r"minor",
+]
+
+
+class KeywordClassifier:
+    """Compiled keyword matcher that answers unambiguous descriptions locally.
+
+    Returns (priority, confidence). Descriptions with several keyword
+    matches, all from one category, are confident; a single match, mixed
+    or unmatched ones are not. Low is never answered locally: a minor
+    keyword says nothing about what else the description contains.
+    """
+
+    def __init__(self, keywords=KEYWORDS, min_confidence=0.9):
+        self.min_confidence = min_confidence
+        self._patterns = {
+            priority: re.compile(r"\b(?:" + "|".join(terms) + r")\b", re.IGNORECASE)
+            for priority, terms in keywords.items()
+        }
+
+    @classmethod
+    def from_env(cls):
+        return cls(min_confidence=float(os.getenv("FAST_PATH_MIN_CONFIDENCE", 0.9)))
+
+    def classify(self, description):
+        counts = {
+            priority: len(pattern.findall(description))
+            for priority, pattern in self._patterns.items()
+        }
+        total = sum(counts.values())
+        if total == 0:
+            return "low", 0.0
+
+        # Most severe category wins ties, matching the LLM prompt's intent.
+        priority = max(counts, key=lambda p: (counts[p], p == "high", p == "medium"))
+        if counts[priority] == total:
+            confidence = 0.8 if total == 1 else 0.97
+        else:
+            confidence = round(0.5 * counts[priority] / total, 2)
+        return priority, confidence
+
+    def is_confident(self, priority, confidence):
+        return priority != "low" and confidence >= self.min_confidence
@@ -0,0 +1,66 @@
+"""Flask routes shared by connect.py and connect_alternative.py."""
+import logging
+
+from flask import Flask, jsonify, request
+from flask_cors import CORS
+
+from classifier import classify_batch
+from metrics import CONTENT_TYPE, REGISTRY
+from service import BATCH_MAX_WORKERS, batch_response
+
+logger = logging.getLogger(__name__)
+
+
+def respond(status, body, headers=None):
+    return jsonify(body), status, headers or {}
+
+
+def create_app(service, health_fields):
+    """Build the Flask app serving `service`; `health_fields()` adds server-specific fields to GET /."""
+    app = Flask(__name__)
+    CORS(app)
+
+    @app.route('/', methods=['GET'])
+    def health_check():
+        return respond(*service.health(**health_fields()))
+
+    @app.route('/healthz', methods=['GET'])
+    def liveness():
+        return jsonify({"status": "ok"})
+
+    @app.route('/ready', methods=['GET'])
+    def readiness():
+        return respond(*service.readiness())
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return REGISTRY.render(), 200, {"Content-Type": CONTENT_TYPE}
+
+    @app.route('/classify', methods=['POST'])
+    def classify_fir():
+        data = request.json
+        answered = service.check_classify(data, request.args)
+        if answered:
+            return respond(*answered)
+
+        try:
+            return jsonify(service.classify(data["incidentDescription"], data.get("firId")))
+        except Exception as e:
+            logger.error("Error in AI classification: %s", e)
+            return jsonify({"error": str(e)}), 500
+
+    @app.route('/jobs/<job_id>', methods=['GET'])
+    def get_job(job_id):
+        return respond(*service.get_job(job_id))
+
+    @app.route('/classify/batch', methods=['POST'])
+    def classify_fir_batch():
+        data = request.json or {}
+        answered = service.check_batch(data)
+        if answered:
+            return respond(*answered)
+
+        results = classify_batch(data["incidentDescriptions"], service.classify, max_workers=BATCH_MAX_WORKERS)
+        return respond(*batch_response(results))
+
+    return app
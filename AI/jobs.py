@@ -0,0 +1,165 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.request
+import uuid
+from collections import OrderedDict
+from urllib.parse import urlparse
+
+from resilience import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+
+class _NoRedirect(urllib.request.HTTPRedirectHandler):
+    """Refuses redirects, which could point a callback past the host allowlist."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+CALLBACK_OPENER = urllib.request.build_opener(_NoRedirect)
+
+
+class QueueFullError(Exception):
+    """Raised when the job backlog is at its configured depth."""
+
+
+class JobQueue:
+    """Bounded queue of classification jobs drained by a worker pool.
+
+    `run(description, fir_id)` does the classification. Finished jobs are kept
+    for polling (oldest evicted beyond `max_retained`) and, when a job
+    has a callback URL, POSTed there. Callbacks are accepted only for
+    hosts in `allowed_callback_hosts`, so the service can't be made to
+    POST to internal addresses; without an allowlist they are refused.
+    """
+
+    def __init__(self, run, workers=4, max_depth=100, max_retained=1000,
+                 callback_timeout=5, callback_attempts=3, allowed_callback_hosts=None):
+        self.run = run
+        self.workers = workers
+        self.max_retained = max_retained
+        self.callback_timeout = callback_timeout
+        self.callback_attempts = callback_attempts
+        self.allowed_callback_hosts = allowed_callback_hosts
+        self.counts = {"submitted": 0, "rejected": 0, "done": 0, "failed": 0, "callbacks_failed": 0}
+        self._pending = queue.Queue(maxsize=max_depth)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    @classmethod
+    def from_env(cls, run):
+        hosts = os.getenv("JOB_CALLBACK_ALLOWED_HOSTS")
+        return cls(
+            run,
+            workers=int(os.getenv("JOB_WORKERS", 4)),
+            max_depth=int(os.getenv("JOB_QUEUE_MAX_DEPTH", 100)),
+            max_retained=int(os.getenv("JOB_MAX_RETAINED", 1000)),
+            callback_timeout=float(os.getenv("JOB_CALLBACK_TIMEOUT_SECONDS", 5)),
+            allowed_callback_hosts={h.strip() for h in hosts.split(",") if h.strip()} if hosts else None,
+        )
+
+    def check_callback_url(self, url):
+        """Return an error message for an unusable callback URL, else None."""
+        parsed = urlparse(url)
+        if parsed.scheme not in ("http", "https") or not parsed.hostname:
+            return "callbackUrl must be an http(s) URL"
+        if not self.allowed_callback_hosts:
+            return "callbackUrl is not enabled on this service (JOB_CALLBACK_ALLOWED_HOSTS is unset)"
+        if parsed.hostname not in self.allowed_callback_hosts:
+            return "callbackUrl host is not allowed"
+        return None
+
+    def submit(self, description, callback_url=None, fir_id=None):
+        job = {
+            "id": uuid.uuid4().hex,
+            "status": "queued",
+            "createdAt": time.time(),
+            "callbackUrl": callback_url,
+        }
+        self._start_workers()
+        with self._lock:
+            try:
+                self._pending.put_nowait((job["id"], description, fir_id))
+            except queue.Full:
+                self.counts["rejected"] += 1
+                raise QueueFullError("Classification job queue is full")
+            self.counts["submitted"] += 1
+            self._jobs[job["id"]] = job
+            self._evict()
+        return dict(job)
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def _start_workers(self):
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"classify-job-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            job_id, description, fir_id = self._pending.get()
+            self._update(job_id, status="running", startedAt=time.time())
+            try:
+                update = {"status": "done", "result": self.run(description, fir_id)}
+            except Exception as e:
+                logger.warning("Classification job %s failed: %s", job_id, e)
+                update = {"status": "failed", "error": str(e)}
+            job = self._update(job_id, finishedAt=time.time(), **update)
+            with self._lock:
+                self.counts[update["status"]] += 1
+            if job is not None and job.get("callbackUrl"):
+                self._deliver(job)
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return None
+            job.update(fields)
+            return dict(job)
+
+    def _evict(self):
+        # Only finished jobs are dropped; queued and running ones stay pollable.
+        excess = len(self._jobs) - self.max_retained
+        if excess <= 0:
+            return
+        for job_id in [j for j, job in self._jobs.items() if job["status"] in ("done", "failed")][:excess]:
+            del self._jobs[job_id]
+
+    def _deliver(self, job):
+        body = json.dumps({
+            "jobId": job["id"],
+            "status": job["status"],
+            "result": job.get("result"),
+            "error": job.get("error"),
+        }).encode("utf-8")
+        for attempt in range(self.callback_attempts):
+            request = urllib.request.Request(job["callbackUrl"], data=body, method="POST",
+                                             headers={"Content-Type": "application/json"})
+            try:
+                with CALLBACK_OPENER.open(request, timeout=self.callback_timeout):
+                    return
+            except Exception as e:
+                logger.warning("Callback for job %s failed (attempt %d): %s", job["id"], attempt + 1, e)
+                if attempt + 1 < self.callback_attempts:
+                    time.sleep(backoff_delay(attempt, 0.5, 5))
+        with self._lock:
+            self.counts["callbacks_failed"] += 1
+
+    def stats(self):
+        with self._lock:
+            return {"queue_depth": self._pending.qsize(), "max_depth": self._pending.maxsize,
+                    "workers": self.workers, "retained": len(self._jobs), **self.counts}
@@ -0,0 +1,226 @@
+import threading
+import time
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{value}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+            state["sum"] += value
+            state["count"] += 1
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        names = self.labelnames + ("le",)
+        with self._lock:
+            for key, state in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, state["counts"]):
+                    lines.append(f"{self.name}_bucket{_format_labels(names, key + (bound,))} {count}")
+                lines.append(f"{self.name}_bucket{_format_labels(names, key + ('+Inf',))} {state['count']}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {state['sum']}")
+                lines.append(f"{self.name}_count{labels} {state['count']}")
+        return lines
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+
+
+class Registry:
+    """Holds metrics plus collectors that report component state at scrape time.
+
+    A collector is a callable returning (name, kind, documentation, value)
+    or (name, kind, documentation, value, labels) tuples, used for numbers
+    owned elsewhere such as cache hit counters.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        described = set()
+        for collector in self._collectors:
+            for name, kind, documentation, value, *labels in collector():
+                if name not in described:
+                    described.add(name)
+                    lines.extend([f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"])
+                labels = labels[0] if labels else {}
+                lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+CLASSIFICATIONS = REGISTRY.register(Counter(
+    "ai_classifications_total", "Classifications by outcome (deciding tier, error or cancelled)", ["outcome"]))
+PRIORITIES = REGISTRY.register(Counter(
+    "ai_classification_priority_total", "Classified priorities", ["priority"]))
+CLASSIFY_LATENCY = REGISTRY.register(Histogram(
+    "ai_classification_duration_seconds", "End-to-end classification latency"))
+UPSTREAM_LATENCY = REGISTRY.register(Histogram(
+    "ai_upstream_request_duration_seconds", "Latency of individual LLM provider calls", ["backend", "outcome"]))
+PARSE_LATENCY = REGISTRY.register(Histogram(
+    "ai_parse_duration_seconds", "Time spent parsing the LLM response into a priority",
+    buckets=(0.00001, 0.00005, 0.0001, 0.0005, 0.001)))
+DESCRIPTION_TOKENS = REGISTRY.register(Histogram(
+    "ai_description_tokens", "Estimated description tokens per upstream call, as received and as submitted",
+    ["stage"], buckets=(16, 32, 64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384)))
+DESCRIPTIONS_SHORTENED = REGISTRY.register(Counter(
+    "ai_descriptions_shortened_total", "Over-budget descriptions shortened before the upstream call", ["method"]))
+IN_FLIGHT = REGISTRY.register(Gauge(
+    "ai_classifications_in_flight", "Classifications currently being processed"))
+
+
+def component_collector(cache=None, flight=None, router=None, jobs=None, index=None):
+    """Expose the health-endpoint stats of the service components as metrics."""
+    def collect():
+        samples = []
+        if cache is not None:
+            stats = cache.stats()
+            samples += [
+                ("ai_cache_hits_total", "counter", "Classification cache hits", stats["hits"]),
+                ("ai_cache_misses_total", "counter", "Classification cache misses", stats["misses"]),
+                ("ai_cache_hit_ratio", "gauge", "Classification cache hit ratio", stats["hit_rate"]),
+                ("ai_cache_entries", "gauge", "Entries in the in-memory cache tier", stats["entries"]),
+            ]
+        if flight is not None:
+            stats = flight.stats()
+            samples += [
+                ("ai_upstream_in_flight", "gauge", "Distinct upstream calls in flight", stats["in_flight"]),
+                ("ai_coalesced_total", "counter", "Requests that joined an in-flight call", stats["coalesced"]),
+            ]
+        if router is not None:
+            stats = router.stats()
+            samples += [
+                ("ai_hedged_requests_total", "counter", "Hedged requests sent to a second backend", stats["hedges"]),
+                ("ai_hedges_skipped_total", "counter", "Hedges not sent because the hedge budget was spent",
+                 stats["hedges_skipped"]),
+            ]
+            for backend in stats["backends"]:
+                labels = {"backend": backend["name"]}
+                samples += [
+                    ("ai_limiter_queue_depth", "gauge", "Calls waiting on the rate limiter",
+                     backend["limiter"]["queue_depth"], labels),
+                    ("ai_limiter_rate_per_second", "gauge", "Current adaptive upstream rate",
+                     backend["limiter"]["rate_per_second"], labels),
+                    ("ai_breaker_open", "gauge", "1 when the upstream circuit breaker is not closed",
+                     int(backend["breaker"]["state"] != "closed"), labels),
+                    ("ai_upstream_retries_total", "counter", "Upstream call retries", backend["retries"], labels),
+                    ("ai_backend_wins_total", "counter", "Calls answered by this backend", backend["wins"], labels),
+                ]
+        if index is not None:
+            stats = index.stats()
+            samples += [
+                ("ai_near_duplicate_entries", "gauge", "Descriptions in the near-duplicate index", stats["entries"]),
+                ("ai_near_duplicate_lookups_total", "counter", "Near-duplicate index lookups", stats["lookups"]),
+                ("ai_near_duplicate_matches_total", "counter", "Lookups that found a near-duplicate",
+                 stats["matches"]),
+                ("ai_near_duplicate_reuses_total", "counter", "Lookups that reused a near-duplicate's priority",
+                 stats["reuses"]),
+            ]
+        if jobs is not None:
+            stats = jobs.stats()
+            samples += [
+                ("ai_job_queue_depth", "gauge", "Async classification jobs waiting for a worker", stats["queue_depth"]),
+                ("ai_job_queue_max_depth", "gauge", "Configured async job queue bound", stats["max_depth"]),
+                ("ai_jobs_submitted_total", "counter", "Async classification jobs accepted", stats["submitted"]),
+                ("ai_jobs_rejected_total", "counter", "Async jobs rejected because the queue was full", stats["rejected"]),
+                ("ai_jobs_done_total", "counter", "Async classification jobs completed", stats["done"]),
+                ("ai_jobs_failed_total", "counter", "Async classification jobs that failed", stats["failed"]),
+                ("ai_job_callbacks_failed_total", "counter", "Job callbacks not delivered", stats["callbacks_failed"]),
+            ]
+        return samples
+    return collect
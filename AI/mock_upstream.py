@@ -0,0 +1,164 @@
+"""Local OpenAI-compatible stand-in for the Groq chat completions API.
+
+Answers POST /openai/v1/chat/completions (and /v1/chat/completions) with
+the keyword fast-path verdict for the FIR description in the prompt, after
+a configurable latency, and can inject 5xx errors and 429 throttling.
+
+    python mock_upstream.py --port 8089 --latency lognormal:0.3,0.5 --rate-limit-rate 0.05
+    GROQ_BASE_URL=http://127.0.0.1:8089 GROQ_API_KEY=test python connect.py
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fast_path import KeywordClassifier
+
+CHAT_PATHS = ("/openai/v1/chat/completions", "/v1/chat/completions")
+
+
+def parse_latency(spec):
+    """Build a sampler (seconds) from "fixed:S", "uniform:LO,HI", "normal:MEAN,SD" or "lognormal:MEDIAN,SIGMA"."""
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(",") if v]
+    if kind == "fixed":
+        return lambda rng: values[0]
+    if kind == "uniform":
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "normal":
+        return lambda rng: max(0.0, rng.gauss(values[0], values[1]))
+    if kind == "lognormal":
+        median, sigma = values
+        return lambda rng: median * rng.lognormvariate(0, sigma)
+    raise ValueError(f"Unknown latency distribution: {spec}")
+
+
+class MockUpstream:
+    """Threaded stub server; use as a context manager or run this module."""
+
+    def __init__(self, latency="fixed:0.05", error_rate=0.0, rate_limit_rate=0.0, retry_after=1,
+                 seed=None, host="127.0.0.1", port=0):
+        self.sample_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.requests = 0
+        self.rng = random.Random(seed)
+        self.classifier = KeywordClassifier()
+        self._lock = threading.Lock()
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def decide(self):
+        """Pick (delay, status) for one request under the shared RNG."""
+        with self._lock:
+            self.requests += 1
+            delay = self.sample_latency(self.rng)
+            roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            return 0.0, 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            return delay, 500
+        return delay, 200
+
+    def completion(self, payload):
+        prompt = payload["messages"][-1]["content"]
+        match = re.search(r"FIR Description:(.*)Priority:", prompt, re.DOTALL)
+        priority, _ = self.classifier.classify(match.group(1) if match else prompt)
+        return {
+            "id": f"mock-{self.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": priority.capitalize()},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": len(prompt.split()), "completion_tokens": 1,
+                      "total_tokens": len(prompt.split()) + 1},
+        }
+
+    def _handler_class(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def send_json(self, status, data, headers=()):
+                body = json.dumps(data).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in headers:
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if self.path not in CHAT_PATHS:
+                    return self.send_json(404, {"error": {"message": "Not found"}})
+
+                delay, status = upstream.decide()
+                time.sleep(delay)
+                if status == 429:
+                    return self.send_json(429, {"error": {"message": "Rate limit reached", "type": "tokens"}},
+                                          headers=[("Retry-After", str(upstream.retry_after))])
+                if status != 200:
+                    return self.send_json(status, {"error": {"message": "Injected upstream error"}})
+                self.send_json(200, upstream.completion(payload))
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local OpenAI-compatible stub for the classifier")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", default="fixed:0.05",
+                        help="fixed:S | uniform:LO,HI | normal:MEAN,SD | lognormal:MEDIAN,SIGMA (seconds)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    with MockUpstream(args.latency, args.error_rate, args.rate_limit_rate, args.retry_after,
+                      args.seed, args.host, args.port) as upstream:
+        print(f"Mock upstream listening on {upstream.url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,315 @@
+import functools
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from array import array
+from collections import OrderedDict, namedtuple
+
+from classifier import MODEL, PROMPT_VERSION
+from fast_path import KEYWORDS, SEVERITY_MARKERS
+from sqlite_writer import SQLiteWriter
+
+# Mersenne prime for the (a*x + b) mod p permutation family
+PRIME = (1 << 61) - 1
+
+# FIR IDs kept per indexed description, most recent last
+MAX_FIR_IDS = 20
+
+# Bump when the signature scheme changes so persisted signatures are not compared with new ones
+SIGNATURE_VERSION = 2
+
+# Single-word keywords and markers, matched per distinct word (a whole-text alternation costs ~1 ms);
+# the multi-word keywords all contain a marker
+SEVERITY_WORD = re.compile(
+    "|".join(t for t in [t for terms in KEYWORDS.values() for t in terms] + SEVERITY_MARKERS if " " not in t)
+)
+
+# priority is set only when the matched entry may lend its priority (see NearDuplicateIndex)
+Match = namedtuple("Match", "signature terms entry_id similarity priority duplicates")
+
+
+def tokenize(description):
+    return re.findall(r"\w+", description.casefold())
+
+
+@functools.lru_cache(maxsize=65536)
+def is_severity_word(word):
+    return SEVERITY_WORD.fullmatch(word) is not None
+
+
+def severity_terms(words):
+    """Sorted distinct severity keywords and harm markers among casefolded `words`."""
+    return sorted({word for word in words if is_severity_word(word)})
+
+
+def shingles(words, size=2):
+    """Word `size`-grams, hashed to 32 bits."""
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode("utf-8"))} if words else set()
+    return {zlib.crc32(" ".join(words[i:i + size]).encode("utf-8")) for i in range(len(words) - size + 1)}
+
+
+class NearDuplicateIndex:
+    """MinHash signatures of classified descriptions with LSH banding.
+
+    Descriptions whose estimated Jaccard similarity with an indexed one is
+    at least `threshold` report the FIR IDs filed with it. Its priority is
+    reused only from `reuse_threshold` up and when both descriptions name
+    the same severity terms, so a one-word change from "argued with" to
+    "shot" is still sent to the LLM. Signatures use one-permutation
+    hashing (one hash per shingle, not one per permutation) and only the
+    few entries sharing an LSH band are compared, so a lookup stays under
+    a millisecond regardless of index size. With `db_path`, entries are
+    kept in SQLite and reloaded by load(), which runs on first use unless
+    warm-up calls it earlier.
+    """
+
+    def __init__(self, num_perm=64, bands=16, threshold=0.6, reuse_threshold=0.9, shingle_size=2,
+                 max_entries=200000, db_path=None, namespace=f"{MODEL}/{PROMPT_VERSION}"):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.reuse_threshold = max(threshold, reuse_threshold)
+        self.shingle_size = shingle_size
+        self.max_entries = max_entries
+        self.db_path = db_path
+        # Signatures from another scheme or shingle size are not comparable
+        self.namespace = f"{namespace}/v{SIGNATURE_VERSION}.{shingle_size}"
+        self.lookups = 0
+        self.matches = 0
+        self.reuses = 0
+        rng = random.Random(1)
+        self._perm = (rng.randrange(1, PRIME), rng.randrange(PRIME))
+        self._fill = rng.randrange(1, 1 << 32) | 1
+        self._entries = OrderedDict()
+        self._buckets = [{} for _ in range(bands)]
+        self._next_id = 1
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._db = None
+        self._writer = None
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS near_duplicates (id INTEGER PRIMARY KEY, namespace TEXT NOT NULL, "
+                "signature BLOB NOT NULL, priority TEXT NOT NULL, fir_ids TEXT NOT NULL, created_at REAL NOT NULL, "
+                "terms TEXT NOT NULL DEFAULT '[]')"
+            )
+            columns = [row[1] for row in self._db.execute("PRAGMA table_info(near_duplicates)")]
+            if "terms" not in columns:
+                # Tables from before severity terms were stored; their rows are pruned by load()
+                self._db.execute("ALTER TABLE near_duplicates ADD COLUMN terms TEXT NOT NULL DEFAULT '[]'")
+            self._db.commit()
+            # Inserts, FIR ID updates and evictions are committed in the background, in order
+            self._writer = SQLiteWriter(db_path)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            num_perm=int(os.getenv("NEAR_DUP_NUM_PERM", 64)),
+            bands=int(os.getenv("NEAR_DUP_BANDS", 16)),
+            threshold=float(os.getenv("NEAR_DUP_THRESHOLD", 0.6)),
+            reuse_threshold=float(os.getenv("NEAR_DUP_REUSE_THRESHOLD", 0.9)),
+            shingle_size=int(os.getenv("NEAR_DUP_SHINGLE_SIZE", 2)),
+            max_entries=int(os.getenv("NEAR_DUP_MAX_ENTRIES", 200000)),
+            db_path=os.getenv("NEAR_DUP_DB_PATH") or None,
+        )
+
+    def signature(self, description):
+        return self._signature(tokenize(description))
+
+    def _signature(self, words):
+        hashes = shingles(words, self.shingle_size)
+        if not hashes:
+            return None
+        # One permutation split into num_perm bins, keeping each bin's minimum
+        a, b = self._perm
+        k = self.num_perm
+        bins = [None] * k
+        for x in hashes:
+            h = (a * x + b) % PRIME
+            i, value = h % k, h // k
+            if bins[i] is None or value < bins[i]:
+                bins[i] = value
+        # Empty bins borrow from the next filled one, offset by distance, so equal sets still agree
+        filled = next(i for i in range(k) if bins[i] is not None)
+        signature = array("I", [0]) * k
+        for step in range(k):
+            i = (filled - step) % k
+            if bins[i] is not None:
+                donor, distance = bins[i], 0
+            else:
+                distance += 1
+            # Keep the low 32 bits; collisions at that width are negligible
+            signature[i] = (donor + distance * self._fill) & 0xFFFFFFFF
+        return signature
+
+    def lookup(self, description):
+        """Return a Match for the most similar indexed description (entry_id None if below threshold).
+
+        Callers pass the preprocessed, token-bounded text so lookup cost stays flat.
+        """
+        tokens = tokenize(description)
+        signature = self._signature(tokens)
+        if signature is None:
+            return None
+        terms = severity_terms(tokens)
+        if not self._loaded:
+            self.load()
+        with self._lock:
+            self.lookups += 1
+            candidates = set()
+            for band, key in enumerate(self._band_keys(signature)):
+                candidates.update(self._buckets[band].get(key, ()))
+
+            scored = []
+            for entry_id in candidates:
+                entry = self._entries[entry_id]
+                similarity = sum(a == b for a, b in zip(signature, entry["signature"])) / self.num_perm
+                if similarity >= self.threshold:
+                    scored.append((similarity, entry_id))
+            if not scored:
+                return Match(signature, terms, None, 0.0, None, [])
+
+            self.matches += 1
+            scored.sort(reverse=True)
+            similarity, best = scored[0]
+            priority = None
+            for candidate_similarity, entry_id in scored:
+                if candidate_similarity < self.reuse_threshold:
+                    break
+                if self._entries[entry_id]["terms"] == terms:
+                    similarity, best, priority = candidate_similarity, entry_id, self._entries[entry_id]["priority"]
+                    break
+            duplicates = []
+            for _, entry_id in scored:
+                duplicates.extend(fir_id for fir_id in reversed(self._entries[entry_id]["fir_ids"])
+                                  if fir_id not in duplicates)
+            return Match(signature, terms, best, round(similarity, 4), priority, duplicates[:MAX_FIR_IDS])
+
+    def record(self, match, priority, fir_id=None, reused=False):
+        """Index a description classified as `priority`, or attach `fir_id` to the entry it matched.
+
+        A match whose priority was reused only gains the FIR ID. With
+        `priority` None (an answer not trusted for reuse), the FIR ID is
+        linked to the matched entry, if any, and nothing new is indexed.
+        `reused` marks a result answered from the index, counted in stats.
+        """
+        if match is None:
+            return
+        if not self._loaded:
+            self.load()
+        with self._lock:
+            if reused:
+                self.reuses += 1
+            matched = match.entry_id is not None and match.entry_id in self._entries
+            if matched and (match.priority is not None or priority is None):
+                if fir_id is None:
+                    return
+                entry = self._entries[match.entry_id]
+                if fir_id not in entry["fir_ids"]:
+                    entry["fir_ids"] = (entry["fir_ids"] + [fir_id])[-MAX_FIR_IDS:]
+                    self._save(match.entry_id, entry, update=True)
+                return
+            if priority is None:
+                return
+
+            entry_id = self._next_id
+            self._next_id += 1
+            entry = {"signature": match.signature, "terms": match.terms, "priority": priority,
+                     "fir_ids": [fir_id] if fir_id else []}
+            self._add(entry_id, entry)
+            self._save(entry_id, entry)
+            self._evict()
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [hash(tuple(signature[i:i + rows])) for i in range(0, self.num_perm, rows)]
+
+    def _add(self, entry_id, entry):
+        self._entries[entry_id] = entry
+        for band, key in enumerate(self._band_keys(entry["signature"])):
+            self._buckets[band].setdefault(key, []).append(entry_id)
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            entry_id, entry = self._entries.popitem(last=False)
+            for band, key in enumerate(self._band_keys(entry["signature"])):
+                bucket = self._buckets[band][key]
+                bucket.remove(entry_id)
+                if not bucket:
+                    del self._buckets[band][key]
+            if self._writer is not None:
+                self._writer.execute("DELETE FROM near_duplicates WHERE id = ?", (entry_id,))
+
+    def _save(self, entry_id, entry, update=False):
+        if self._writer is None:
+            return
+        if update:
+            self._writer.execute("UPDATE near_duplicates SET fir_ids = ? WHERE id = ?",
+                                 (json.dumps(entry["fir_ids"]), entry_id))
+        else:
+            self._writer.execute(
+                "INSERT INTO near_duplicates (id, namespace, signature, priority, fir_ids, created_at, terms) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (entry_id, self.namespace, entry["signature"].tobytes(), entry["priority"],
+                 json.dumps(entry["fir_ids"]), time.time(), json.dumps(entry["terms"])),
+            )
+
+    def flush(self):
+        """Block until queued SQLite writes are committed."""
+        if self._writer is not None:
+            self._writer.flush()
+
+    def load(self):
+        """Read persisted entries into memory; later calls do nothing."""
+        with self._lock:
+            if self._loaded:
+                return
+            if self._db is not None:
+                self._load()
+            self._loaded = True
+
+    def _load(self):
+        row = self._db.execute("SELECT MAX(id) FROM near_duplicates").fetchone()
+        self._next_id = (row[0] or 0) + 1
+        # Entries from another model or prompt version are not reused, and only the newest max_entries are kept
+        self._db.execute(
+            "DELETE FROM near_duplicates WHERE namespace != ? OR id NOT IN "
+            "(SELECT id FROM near_duplicates WHERE namespace = ? ORDER BY id DESC LIMIT ?)",
+            (self.namespace, self.namespace, self.max_entries),
+        )
+        self._db.commit()
+        rows = self._db.execute(
+            "SELECT id, signature, priority, fir_ids, terms FROM near_duplicates ORDER BY id",
+        )
+        for entry_id, blob, priority, fir_ids, terms in rows:
+            signature = array("I")
+            signature.frombytes(blob)
+            if len(signature) == self.num_perm:
+                self._add(entry_id, {"signature": signature, "terms": json.loads(terms), "priority": priority,
+                                     "fir_ids": json.loads(fir_ids)})
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "loaded": self._loaded,
+                "lookups": self.lookups,
+                "matches": self.matches,
+                "match_rate": round(self.matches / self.lookups, 4) if self.lookups else 0.0,
+                "reuses": self.reuses,
+                "threshold": self.threshold,
+                "reuse_threshold": self.reuse_threshold,
+                "persistent": self._db is not None,
+                "pending_writes": self._writer.pending() if self._writer is not None else 0,
+            }
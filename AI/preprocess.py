@@ -0,0 +1,153 @@
+import os
+import re
+import unicodedata
+from collections import namedtuple
+
+from fast_path import KEYWORDS
+
+# Hard cap applied before any other work so a pasted document can't make preprocessing itself slow
+MAX_INPUT_CHARS = 100000
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+INVISIBLE = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\x7f\u200b-\u200f\u2060\ufeff]")
+PUNCTUATION = str.maketrans({"\u2018": "'", "\u2019": "'", "\u201c": '"', "\u201d": '"',
+                             "\u2013": "-", "\u2014": "-", "\u2026": "..."})
+MOJIBAKE = re.compile(r"[\u00c2\u00c3][\u0080-\u00bf]|\u00e2\u20ac")
+
+# An addressee's station: at most two words before it and a short place after, as in "Kotwali Police Station, Jaipur"
+STATION = r"(?:[\w.-]+\s+){0,2}(?:police station|p\.\s?s\.|thana)(?:\s*,\s*[\w .-]{1,30})?"
+
+# Letter formalities, sign-offs and contact details common in written complaints. Header lines
+# must hold nothing else: a line that goes on to say what happened is kept.
+BOILERPLATE_LINES = re.compile(
+    r"^\s*(?:to|from|"
+    r"date\s*:?\s*\d{1,2}\s*[./ -]\s*(?:\d{1,2}|[a-z]{3,9})\s*[./ -]\s*\d{2,4}|"
+    r"place\s*:?\s*[\w.-]+(?:[ ,]+[\w.-]+){0,2}|"
+    r"(?:the\s+)?(?:station house officer|s\.?h\.?o\.?|officer[- ]in[- ]charge|inspector[- ]in[- ]charge)"
+    r"(?:\s*,?\s*" + STATION + r")?|" + STATION + r"|"
+    r"(?:respected|dear)\s+(?:sir|madam|sir\s*/\s*madam|sir or madam))\s*[,.]?\s*$",
+    re.IGNORECASE,
+)
+SIGN_OFF = re.compile(r"^\s*(?:yours\s+(?:faithfully|sincerely|truly|obediently)|thanking you)\b", re.IGNORECASE)
+BOILERPLATE_PHRASES = re.compile(
+    r"(?:i|we)\s+(?:humbly\s+|kindly\s+)?request\s+you\s+to\s+(?:kindly\s+|please\s+)?"
+    r"(?:take|initiate)\s+(?:necessary|strict|appropriate|legal)\s+action[^.!?]*[.!?]?|"
+    r"kindly\s+do\s+the\s+needful[.!?]?|"
+    r"thanking\s+you(?:\s+in\s+anticipation)?[.!,]?|"
+    r"[\w.+-]+@[\w-]+\.[\w.-]+|"
+    r"(?:\+\d{1,3}[ -]?)?\b\d{5}[ -]?\d{5}\b",
+    re.IGNORECASE,
+)
+SEVERITY_TERMS = re.compile(r"\b(?:" + "|".join(t for terms in KEYWORDS.values() for t in terms) + r")\b",
+                            re.IGNORECASE)
+
+Prepared = namedtuple("Prepared", "text original_tokens tokens method")
+
+
+def count_tokens(text):
+    """Estimate LLM tokens locally, erring high: one per short word or symbol,
+    more for long words, digit runs and non-Latin script."""
+    total = 0
+    for piece in TOKEN_PATTERN.findall(text):
+        if piece.isdigit():
+            total += (len(piece) + 2) // 3
+        elif piece.isascii():
+            total += 1 + len(piece) // 8
+        else:
+            total += 1 + len(piece) // 2
+    return total
+
+
+def truncate_tokens(text, budget):
+    """Longest prefix of `text`, cut at a token boundary, within `budget` tokens."""
+    used, end = 0, 0
+    for match in TOKEN_PATTERN.finditer(text):
+        used += count_tokens(match.group())
+        if used > budget:
+            break
+        end = match.end()
+    return text[:end]
+
+
+def normalize(text):
+    """Repair common mis-decoding, apply NFKC, drop invisible characters and plain-ASCII the punctuation."""
+    text = INVISIBLE.sub("", text)
+    if MOJIBAKE.search(text):
+        # UTF-8 read as cp1252 ("donâ€™t"); left alone unless the whole text round-trips
+        try:
+            text = text.encode("cp1252").decode("utf-8")
+        except UnicodeError:
+            pass
+    text = unicodedata.normalize("NFKC", text).translate(PUNCTUATION)
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def strip_boilerplate(text):
+    kept = []
+    for line in text.split("\n"):
+        if SIGN_OFF.match(line):
+            # Everything after the sign-off is name, address and contact details
+            break
+        if not BOILERPLATE_LINES.match(line):
+            kept.append(line)
+    return " ".join(BOILERPLATE_PHRASES.sub(" ", " ".join(kept)).split())
+
+
+class DescriptionPreprocessor:
+    """Cleans a description and bounds what is sent to the LLM.
+
+    Text is normalized and stripped of letter boilerplate; if it is still
+    over `max_tokens`, either the key sentences are extracted (those with
+    severity terms first, then the opening ones) or it is truncated.
+    """
+
+    def __init__(self, max_tokens=512, over_budget="extract", strip=True):
+        if over_budget not in ("extract", "truncate"):
+            raise ValueError("over_budget must be 'extract' or 'truncate'")
+        self.max_tokens = max_tokens
+        self.over_budget = over_budget
+        self.strip = strip
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            max_tokens=int(os.getenv("DESCRIPTION_MAX_TOKENS", 512)),
+            over_budget=os.getenv("DESCRIPTION_OVER_BUDGET", "extract"),
+            strip=os.getenv("DESCRIPTION_STRIP_BOILERPLATE", "1") not in ("0", "false"),
+        )
+
+    def prepare(self, description):
+        text = description[:MAX_INPUT_CHARS]
+        original_tokens = count_tokens(text)
+        if len(description) > MAX_INPUT_CHARS:
+            original_tokens = round(original_tokens * len(description) / MAX_INPUT_CHARS)
+        text = normalize(text)
+        cleaned = strip_boilerplate(text) if self.strip else " ".join(text.split())
+        text = cleaned or " ".join(text.split())
+
+        tokens = count_tokens(text)
+        method = None
+        if tokens > self.max_tokens:
+            method = self.over_budget
+            text = self.extract(text) if method == "extract" else truncate_tokens(text, self.max_tokens)
+            tokens = count_tokens(text)
+        return Prepared(text, original_tokens, tokens, method)
+
+    def extract(self, text):
+        sentences = [s for s in SENTENCE_END.split(text) if s]
+        costs = [count_tokens(s) for s in sentences]
+
+        def score(i):
+            # Severity terms matter most; the opening usually says what happened
+            return (len(SEVERITY_TERMS.findall(sentences[i])) * 2 + (i < 2), -i)
+
+        chosen, used = set(), 0
+        for i in sorted(range(len(sentences)), key=score, reverse=True):
+            if used + costs[i] <= self.max_tokens:
+                chosen.add(i)
+                used += costs[i]
+        if not chosen:
+            return truncate_tokens(text, self.max_tokens)
+        return " ".join(sentences[i] for i in sorted(chosen))
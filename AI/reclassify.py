@@ -0,0 +1,178 @@
+"""Re-score historical FIRs from NDJSON with the current prompt and model.
+
+Reads one FIR record per line (from a file or stdin), classifies them in
+bounded-concurrency chunks through the same tiers as the running service,
+and writes one NDJSON result per record as each chunk completes. Records
+the LLM could not score (answered by the local fallback, or offline) are
+retried; if they still fail the run stops before writing that chunk, so
+a resumed run picks them up. With --output and --checkpoint, a crashed
+or stopped run resumes where it stopped:
+
+    python reclassify.py firs.ndjson --output rescored.ndjson --checkpoint rescored.ckpt
+"""
+import argparse
+import contextlib
+import importlib
+import itertools
+import json
+import os
+import sys
+import time
+
+from classifier import classify_batch
+from resilience import backoff_delay
+
+SEVERITY = {"high": 3, "medium": 2, "low": 1}
+
+# Answers that did not come from the current prompt and model
+UNSCORED_TIERS = ("fallback", "offline")
+
+
+class UnscoredError(Exception):
+    """Raised when records in a chunk still could not be scored by the LLM."""
+
+
+def load_checkpoint(path):
+    if path and os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {"input_lines": 0, "output_bytes": 0}
+
+
+def save_checkpoint(path, state):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w") as f:
+        json.dump(state, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def parse_record(line_number, line):
+    """Return (record, description) or (error_result, None) for one input line."""
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        return {"line": line_number, "error": f"Invalid JSON: {e}"}, None
+    if not isinstance(record, dict):
+        return {"line": line_number, "error": "Record is not an object"}, None
+    return record, record.get("incidentDescription") or record.get("description") or ""
+
+
+def to_output(record, result):
+    output = {"id": record.get("id"), "firNumber": record.get("firNumber")}
+    if "error" in result:
+        output["error"] = result["error"]
+        return output
+    output.update(
+        priority=result["priority"],
+        severity=SEVERITY[result["priority"]],
+        previousSeverity=record.get("severity"),
+        tier=result["tier"],
+    )
+    return output
+
+
+def classify_scored(descriptions, classify_one, max_workers, retries):
+    """classify_batch(), retrying items the LLM did not score; raises UnscoredError if some never are."""
+    results = classify_batch(descriptions, classify_one, max_workers=max_workers)
+    for attempt in range(retries + 1):
+        unscored = [i for i, result in enumerate(results) if result.get("tier") in UNSCORED_TIERS]
+        if not unscored:
+            return results
+        if attempt == retries or any(results[i]["tier"] == "offline" for i in unscored):
+            break
+        time.sleep(backoff_delay(attempt, 2, 60))
+        retried = classify_batch([descriptions[i] for i in unscored], classify_one, max_workers=max_workers)
+        for i, result in zip(unscored, retried):
+            results[i] = {**result, "index": i}
+    tier = results[unscored[0]]["tier"]
+    raise UnscoredError(f"{len(unscored)} of {len(descriptions)} records in this chunk were answered by the "
+                        f"{tier} tier instead of the LLM")
+
+
+def reclassify(lines, out, classify_one, batch_size=50, max_workers=8, checkpoint=None, state=None, retries=3):
+    """Stream `lines` through the classifier in chunks, writing NDJSON to `out`.
+
+    Only one chunk is held in memory at a time. After every chunk the
+    output is flushed and, if `checkpoint` is set, progress is recorded.
+    A chunk with records the LLM did not score after `retries` is not
+    written and raises UnscoredError.
+    """
+    state = state or {"input_lines": 0, "output_bytes": 0}
+    line_number = state["input_lines"]
+    numbered = enumerate(lines, start=line_number + 1)
+
+    while True:
+        chunk = list(itertools.islice(numbered, batch_size))
+        if not chunk:
+            break
+
+        parsed = [parse_record(n, line) for n, line in chunk if line.strip()]
+        pending = [(record, description) for record, description in parsed if description is not None]
+        results = iter(classify_scored([d for _, d in pending], classify_one, max_workers, retries))
+
+        for record, description in parsed:
+            output = record if description is None else to_output(record, next(results))
+            out.write(json.dumps(output) + "\n")
+        out.flush()
+
+        state["input_lines"] = chunk[-1][0]
+        if checkpoint:
+            os.fsync(out.fileno())
+            state["output_bytes"] = out.tell()
+            save_checkpoint(checkpoint, state)
+        print(f"Processed {state['input_lines']} records", file=sys.stderr)
+
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-classify FIR records from NDJSON")
+    parser.add_argument("input", nargs="?", default="-", help="NDJSON file of FIR records (default: stdin)")
+    parser.add_argument("--output", default="-", help="NDJSON output file (default: stdout)")
+    parser.add_argument("--checkpoint", help="progress file for resuming; requires --output")
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=8, help="concurrent classifications per batch")
+    parser.add_argument("--retries", type=int, default=3, help="retries for records the LLM did not score")
+    parser.add_argument("--server", default="connect", choices=["connect", "connect_alternative"],
+                        help="service module whose provider client and tiers to use")
+    args = parser.parse_args()
+
+    if args.checkpoint and args.output == "-":
+        parser.error("--checkpoint requires --output")
+
+    # A batch job should wait for rate-limit tokens rather than fall back to keywords
+    os.environ.setdefault("LIMITER_MAX_WAIT_SECONDS", "300")
+    # Importing the service sets up its cache, fast path, limiter and provider client;
+    # keep its startup output and logs off stdout, which may carry the results.
+    with contextlib.redirect_stdout(sys.stderr):
+        service = importlib.import_module(args.server)
+
+    state = load_checkpoint(args.checkpoint)
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    if args.output == "-":
+        out = sys.stdout
+    else:
+        out = open(args.output, "a+" if state["output_bytes"] else "w", encoding="utf-8")
+        # Drop anything written after the last checkpoint so resumed output has no duplicates
+        out.truncate(state["output_bytes"])
+        out.seek(state["output_bytes"])
+
+    try:
+        lines = itertools.islice(source, state["input_lines"], None)
+        reclassify(lines, out, service.classify_description, batch_size=args.batch_size,
+                   max_workers=args.workers, checkpoint=args.checkpoint, state=state, retries=args.retries)
+    except UnscoredError as e:
+        print(f"Stopped after {state['input_lines']} records: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,279 @@
+import asyncio
+import os
+import random
+import threading
+import time
+
+from classifier import UpstreamError
+from metrics import UPSTREAM_LATENCY
+
+
+class CircuitOpenError(UpstreamError):
+    """Raised without calling upstream while the circuit breaker is open."""
+
+
+class RateLimitedError(UpstreamError):
+    """Raised when the local rate limiter cannot admit a call in time."""
+
+
+def is_retryable(error):
+    if not isinstance(error, UpstreamError) or isinstance(error, (CircuitOpenError, RateLimitedError)):
+        return False
+    return error.status is None or error.status == 429 or error.status >= 500
+
+
+def parse_retry_after(value):
+    """Seconds from a Retry-After header (delta-seconds form only)."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, base, cap, retry_after=None):
+    """Full-jitter exponential backoff; a server Retry-After is a lower bound."""
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class TokenBucket:
+    """Token bucket sized to the provider quota that adapts to throttling.
+
+    The refill rate halves on a 429 (and pauses for Retry-After) and
+    creeps back up towards `max_rate` on every success.
+    """
+
+    def __init__(self, rate, capacity, min_rate=None):
+        self.max_rate = rate
+        self.min_rate = min_rate if min_rate is not None else rate / 8
+        self.rate = rate
+        self.capacity = capacity
+        self.queue_depth = 0
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait):
+        """Take a token, returning how long to wait for it, or None if too long."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            wait = max(0.0, self._paused_until - now, (1 - self._tokens) / self.rate)
+            if wait > max_wait:
+                return None
+            self._tokens -= 1
+            return wait
+
+    def acquire(self, max_wait):
+        wait = self.reserve(max_wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            self._queued(1)
+            try:
+                time.sleep(wait)
+            finally:
+                self._queued(-1)
+        return True
+
+    async def acquire_async(self, max_wait):
+        wait = self.reserve(max_wait)
+        if wait is None:
+            return False
+        if wait > 0:
+            self._queued(1)
+            try:
+                await asyncio.sleep(wait)
+            finally:
+                self._queued(-1)
+        return True
+
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.05)
+
+    def on_throttled(self, retry_after=None):
+        with self._lock:
+            self.rate = max(self.min_rate, self.rate / 2)
+            if retry_after:
+                self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+    def _queued(self, delta):
+        with self._lock:
+            self.queue_depth += delta
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rate_per_second": round(self.rate, 4),
+                "capacity": self.capacity,
+                "tokens": round(max(self._tokens, 0.0), 2),
+                "queue_depth": self.queue_depth,
+            }
+
+
+class CircuitBreaker:
+    """Opens after consecutive upstream failures, then lets one probe through."""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def available(self):
+        """Whether allow() would admit a call now, without taking a probe slot.
+
+        An open breaker becomes available once `reset_timeout` has passed,
+        so callers choosing between upstreams still send it the probe.
+        """
+        with self._lock:
+            if self.state == self.OPEN:
+                return time.monotonic() - self._opened_at >= self.reset_timeout
+            if self.state == self.HALF_OPEN:
+                return not self._probing
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def release(self):
+        """Give back a half-open probe slot without recording an outcome."""
+        with self._lock:
+            self._probing = False
+
+    def stats(self):
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures}
+
+
+class UpstreamGuard:
+    """Wraps an upstream `complete(prompt)` with rate limiting, retries and a breaker."""
+
+    def __init__(self, limiter, breaker, max_attempts=3, backoff_base=0.5, backoff_cap=8, max_wait=5,
+                 name="primary"):
+        self.name = name
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        self.max_wait = max_wait
+        self.retries = 0
+
+    @classmethod
+    def from_env(cls, name="primary"):
+        return cls(
+            name=name,
+            limiter=TokenBucket(
+                rate=float(os.getenv("UPSTREAM_RATE_PER_SECOND", 0.5)),
+                capacity=int(os.getenv("UPSTREAM_BURST", 30)),
+            ),
+            breaker=CircuitBreaker(
+                failure_threshold=int(os.getenv("BREAKER_FAILURE_THRESHOLD", 5)),
+                reset_timeout=float(os.getenv("BREAKER_RESET_SECONDS", 30)),
+            ),
+            max_attempts=int(os.getenv("UPSTREAM_MAX_ATTEMPTS", 3)),
+            backoff_base=float(os.getenv("UPSTREAM_BACKOFF_BASE", 0.5)),
+            backoff_cap=float(os.getenv("UPSTREAM_BACKOFF_CAP", 8)),
+            max_wait=float(os.getenv("LIMITER_MAX_WAIT_SECONDS", 5)),
+        )
+
+    def call(self, complete, prompt):
+        for attempt in range(self.max_attempts):
+            if not self.breaker.allow():
+                raise CircuitOpenError("AI provider circuit is open")
+            if not self.limiter.acquire(self.max_wait):
+                self.breaker.release()
+                raise RateLimitedError("AI provider rate limit reached")
+            start = time.perf_counter()
+            try:
+                result = complete(prompt)
+            except Exception as e:
+                UPSTREAM_LATENCY.observe(time.perf_counter() - start, backend=self.name, outcome="error")
+                time.sleep(self._retry_delay(e, attempt))
+                continue
+            UPSTREAM_LATENCY.observe(time.perf_counter() - start, backend=self.name, outcome="ok")
+            self._succeeded()
+            return result
+
+    async def call_async(self, complete, prompt):
+        for attempt in range(self.max_attempts):
+            if not self.breaker.allow():
+                raise CircuitOpenError("AI provider circuit is open")
+            if not await self.limiter.acquire_async(self.max_wait):
+                self.breaker.release()
+                raise RateLimitedError("AI provider rate limit reached")
+            start = time.perf_counter()
+            try:
+                result = await complete(prompt)
+            except Exception as e:
+                UPSTREAM_LATENCY.observe(time.perf_counter() - start, backend=self.name, outcome="error")
+                await asyncio.sleep(self._retry_delay(e, attempt))
+                continue
+            UPSTREAM_LATENCY.observe(time.perf_counter() - start, backend=self.name, outcome="ok")
+            self._succeeded()
+            return result
+
+    def _succeeded(self):
+        self.breaker.record_success()
+        self.limiter.on_success()
+
+    def _retry_delay(self, error, attempt):
+        """Record a failed attempt and return the backoff, or re-raise if final."""
+        if not is_retryable(error):
+            self.breaker.release()
+            raise error
+
+        self.breaker.record_failure()
+        if error.status == 429:
+            self.limiter.on_throttled(error.retry_after)
+
+        delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap, error.retry_after)
+        if attempt + 1 >= self.max_attempts or delay > self.backoff_cap:
+            raise error
+        self.retries += 1
+        return delay
+
+    def stats(self):
+        return {
+            "limiter": self.limiter.stats(),
+            "breaker": self.breaker.stats(),
+            "retries": self.retries,
+        }
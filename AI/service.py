@@ -0,0 +1,139 @@
+"""Classification components and request handling shared by the AI servers.
+
+connect.py, connect_alternative.py and asgi.py differ only in how they reach
+the primary provider and how they serve HTTP. Each builds one Service around
+its provider's `complete` and turns the (status, body[, headers]) tuples
+returned by the handlers below into responses.
+"""
+import logging
+import os
+
+from backends import Backend, Router, add_configured_backends
+from cache import ClassificationCache
+from classifier import MODEL, classify, classify_async
+from fast_path import KeywordClassifier
+from jobs import JobQueue, QueueFullError
+from metrics import REGISTRY, component_collector
+from near_duplicate import NearDuplicateIndex
+from preprocess import DescriptionPreprocessor
+from resilience import UpstreamGuard
+from startup import WarmUp
+
+logger = logging.getLogger(__name__)
+
+# Batch classification limits
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", 100))
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", 8))
+
+
+class Service:
+    """The tiers, upstream router, job queue and warm-up behind one server.
+
+    `complete` is the primary provider call (None runs on LLM_BACKENDS or the
+    local keyword tier alone), `run_job(description, fir_id)` classifies one
+    queued description (`classify` by default), and the remaining arguments
+    configure the LLM_BACKENDS clients.
+    """
+
+    def __init__(self, flight, complete=None, preconnect=None, run_job=None, started=None,
+                 async_client=False, timeout=30, pool_size=20):
+        # Classification cache (set CACHE_DB_PATH to persist across restarts)
+        self.cache = ClassificationCache.from_env()
+
+        # Local keyword tier; also answers everything when no provider is configured
+        self.fast_path = KeywordClassifier.from_env()
+
+        # Cleans descriptions and caps the tokens sent upstream (DESCRIPTION_MAX_TOKENS)
+        self.preprocessor = DescriptionPreprocessor.from_env()
+
+        # Concurrent identical descriptions share one upstream call
+        self.flight = flight
+
+        # Similar descriptions reuse earlier priorities and report duplicate FIR IDs
+        # (set NEAR_DUP_DB_PATH to persist across restarts)
+        self.index = NearDuplicateIndex.from_env()
+
+        # Provider backends, each with its own rate limiter, retries and circuit breaker;
+        # LLM_BACKENDS adds hedging/failover targets behind the primary
+        self.router = Router.from_env()
+        if complete is not None:
+            self.router.add(Backend("groq", complete, UpstreamGuard.from_env(name="groq"), model=MODEL))
+        add_configured_backends(self.router, async_client=async_client, timeout=timeout, pool_size=pool_size)
+
+        # Background workers for /classify?async=1
+        self.jobs = JobQueue.from_env(run_job or self.classify)
+        REGISTRY.register_collector(component_collector(
+            cache=self.cache, flight=self.flight, router=self.router, jobs=self.jobs, index=self.index))
+
+        # Pre-connect upstream and load the on-disk tiers in the background (WARM_UP=0 to skip)
+        self.warm_up = WarmUp.from_env(
+            ([("upstream", preconnect)] if preconnect else [])
+            + [("cache", self.cache.preload), ("near_duplicates", self.index.load)],
+            started=started,
+        )
+
+    def classify(self, description, fir_id=None):
+        return classify(description, self.router.call if self.router.backends else None, cache=self.cache,
+                        fast_path=self.fast_path, flight=self.flight, index=self.index, fir_id=fir_id,
+                        preprocessor=self.preprocessor)
+
+    async def classify_async(self, description, fir_id=None):
+        return await classify_async(description, self.router.call_async if self.router.backends else None,
+                                    cache=self.cache, fast_path=self.fast_path, flight=self.flight,
+                                    index=self.index, fir_id=fir_id, preprocessor=self.preprocessor)
+
+    def health(self, **extra):
+        return 200, {"status": "AI service is running", **extra, "cache": self.cache.stats(),
+                     "single_flight": self.flight.stats(), "upstream": self.router.stats(),
+                     "jobs": self.jobs.stats(), "near_duplicates": self.index.stats()}
+
+    def readiness(self):
+        stats = self.warm_up.stats()
+        return 200 if stats["ready"] else 503, stats
+
+    def check_classify(self, body, query):
+        """Answer a /classify request that needs no classification now.
+
+        Returns the 400 for a missing description or the 202 for a queued
+        job, and None when the server should classify the body itself.
+        """
+        description = body.get("incidentDescription", "")
+        if not description:
+            return 400, {"error": "No description provided"}
+
+        if query.get("async") in ("1", "true"):
+            return self.submit_job(description, body.get("callbackUrl"), body.get("firId"))
+        return None
+
+    def submit_job(self, description, callback_url, fir_id=None):
+        if callback_url:
+            problem = self.jobs.check_callback_url(callback_url)
+            if problem:
+                return 400, {"error": problem}
+
+        try:
+            job = self.jobs.submit(description, callback_url, fir_id)
+        except QueueFullError as e:
+            return 503, {"error": str(e)}, {"Retry-After": "1"}
+        return 202, {"jobId": job["id"], "status": job["status"], "statusUrl": f"/jobs/{job['id']}"}
+
+    def get_job(self, job_id):
+        job = self.jobs.get(job_id)
+        if job is None:
+            return 404, {"error": "Job not found"}
+        return 200, job
+
+    def check_batch(self, body):
+        """Return the error response for an unusable /classify/batch body, or None."""
+        descriptions = body.get("incidentDescriptions")
+
+        if not isinstance(descriptions, list) or not descriptions:
+            return 400, {"error": "No descriptions provided"}
+        if len(descriptions) > BATCH_MAX_ITEMS:
+            return 413, {"error": f"Batch exceeds {BATCH_MAX_ITEMS} descriptions"}
+        return None
+
+
+def batch_response(results):
+    failed = sum(1 for item in results if "error" in item)
+    return 200, {"results": results, "succeeded": len(results) - failed, "failed": failed}
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+
+
+class _LeaderCancelled(Exception):
+    """Set on a coalesced future whose leader was cancelled; a waiter takes over."""
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Collapses concurrent calls with the same key into one execution.
+
+    The first caller for a key runs `fn`; callers arriving while it is in
+    flight wait and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Return (result, shared), where shared is True for waiting callers."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def stats(self):
+        with self._lock:
+            return {"in_flight": len(self._calls), "coalesced": self.coalesced}
+
+
+class AsyncSingleFlight:
+    """asyncio counterpart of SingleFlight for a single event loop.
+
+    If the leader is cancelled (say, by its request deadline), the first
+    waiter to resume runs `fn` itself and the rest wait on it instead.
+    """
+
+    def __init__(self):
+        self.coalesced = 0
+        self._calls = {}
+
+    async def do(self, key, fn):
+        future = self._calls.get(key)
+        if future is not None:
+            self.coalesced += 1
+        while future is not None:
+            try:
+                return await asyncio.shield(future), True
+            except _LeaderCancelled:
+                future = self._calls.get(key)
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            self._fail(future, _LeaderCancelled())
+            raise
+        except Exception as e:
+            self._fail(future, e)
+            raise
+        else:
+            future.set_result(result)
+        finally:
+            del self._calls[key]
+        return result, False
+
+    @staticmethod
+    def _fail(future, error):
+        future.set_exception(error)
+        # Mark it retrieved so a failure nobody waited on is not logged.
+        future.exception()
+
+    def stats(self):
+        return {"in_flight": len(self._calls), "coalesced": self.coalesced}
@@ -0,0 +1,69 @@
+"""Background SQLite writes for the persistent cache tiers."""
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class SQLiteWriter:
+    """Applies writes to a SQLite file on one daemon thread.
+
+    `execute` queues a statement and returns at once, so callers holding a
+    lock or running on the event loop never wait on the disk. The thread
+    commits whatever has queued up as one transaction, so a burst of
+    classifications costs one commit. Statements run in submission order.
+    """
+
+    def __init__(self, db_path, max_batch=500):
+        self.db_path = db_path
+        self.max_batch = max_batch
+        self.commits = 0
+        self._queue = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        # Readers on other connections don't block on (or wait for) the writer
+        self._db.execute("PRAGMA journal_mode=WAL")
+
+    def execute(self, sql, params=()):
+        if self._thread is None:
+            self._start()
+        self._queue.put((sql, params))
+
+    def flush(self):
+        """Block until every queued write is committed."""
+        if self._thread is not None:
+            self._queue.join()
+
+    def pending(self):
+        return self._queue.qsize()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="sqlite-writer", daemon=True)
+            self._thread.start()
+            atexit.register(self.flush)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                with self._db:
+                    for sql, params in batch:
+                        self._db.execute(sql, params)
+                self.commits += 1
+            except sqlite3.Error as e:
+                logger.warning("Dropped %d SQLite writes to %s: %s", len(batch), self.db_path, e)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
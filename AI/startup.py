@@ -0,0 +1,134 @@
+"""Cold-start support: background warm-up, readiness, and an import-time report.
+
+The servers import only what they need to bind the port; heavy provider
+SDKs and on-disk indexes are loaded by warm-up steps in a background
+thread (WARM_UP=0 defers them to first use instead). GET /ready answers 503
+until warm-up has finished, while GET /healthz only says the process is up.
+
+    python startup.py connect --budget-ms 400
+
+reports where import time goes for a server module and exits non-zero
+when its total import exceeds the budget.
+"""
+import argparse
+import logging
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+class WarmUp:
+    """Runs named `(name, fn)` steps once, in order, off the request path.
+
+    A failing step is logged and recorded but does not block readiness:
+    the service can still classify, it just pays that setup on first use.
+    """
+
+    def __init__(self, steps, enabled=True, started=None, import_budget_ms=None):
+        self.steps = list(steps)
+        self.enabled = enabled
+        self.started = started if started is not None else time.perf_counter()
+        self.import_budget_ms = import_budget_ms
+        self.startup_ms = None
+        self.results = {}
+        self._done = threading.Event()
+
+    @classmethod
+    def from_env(cls, steps, started=None):
+        budget = os.getenv("IMPORT_BUDGET_MS")
+        return cls(
+            steps,
+            enabled=os.getenv("WARM_UP", "1") not in ("0", "false"),
+            started=started,
+            import_budget_ms=float(budget) if budget else None,
+        )
+
+    def start(self):
+        """Call once module setup is done; records startup time and starts the steps."""
+        self.startup_ms = round((time.perf_counter() - self.started) * 1000, 1)
+        if self.import_budget_ms is not None and self.startup_ms > self.import_budget_ms:
+            logger.warning("Startup took %.1f ms, over the %.0f ms budget",
+                           self.startup_ms, self.import_budget_ms)
+        if not self.enabled:
+            self._done.set()
+            return
+        threading.Thread(target=self.run, name="warm-up", daemon=True).start()
+
+    def run(self):
+        for name, step in self.steps:
+            start = time.perf_counter()
+            try:
+                step()
+                self.results[name] = {"ok": True}
+            except Exception as e:
+                logger.warning("Warm-up step %s failed: %s", name, e)
+                self.results[name] = {"ok": False, "error": str(e)}
+            self.results[name]["duration_ms"] = round((time.perf_counter() - start) * 1000, 1)
+        self._done.set()
+        logger.info("Warm-up finished", extra={"fields": {
+            "ready_ms": round((time.perf_counter() - self.started) * 1000, 1), "steps": self.results}})
+
+    def ready(self):
+        return self._done.is_set()
+
+    def stats(self):
+        return {"ready": self.ready(), "warm_up": self.enabled, "startup_ms": self.startup_ms,
+                "steps": dict(self.results)}
+
+
+def import_report(module, top=15):
+    """Import `module` in a fresh interpreter under -X importtime.
+
+    Returns (total_ms, [(cumulative_ms, name)]) for the packages it pulls
+    in directly, slowest first. Warm-up is disabled so only import cost
+    is measured.
+    """
+    env = dict(os.environ, WARM_UP="0")
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               capture_output=True, text=True, env=env,
+                               cwd=os.path.dirname(os.path.abspath(__file__)))
+    if completed.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+
+    # Children are printed before their parent, one indent level (two spaces) deeper
+    total, direct, children = 0.0, [], []
+    for line in completed.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match is None:
+            continue
+        cumulative_ms, depth, name = int(match.group(2)) / 1000, len(match.group(3)), match.group(4)
+        if depth == 3:
+            children.append((cumulative_ms, name))
+        elif depth == 1:
+            if name == module:
+                total, direct = cumulative_ms, children
+            children = []
+    direct.sort(reverse=True)
+    return total, direct[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report import time of an AI server module")
+    parser.add_argument("module", nargs="?", default="connect", help="server module (default: connect)")
+    parser.add_argument("--budget-ms", type=float, default=float(os.getenv("IMPORT_BUDGET_MS", 1000)))
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    total, direct = import_report(args.module, args.top)
+    print(f"{'cumulative ms':>14}  module")
+    for cumulative_ms, name in direct:
+        print(f"{cumulative_ms:>14.1f}  {name}")
+    status = "within" if total <= args.budget_ms else "OVER"
+    print(f"\nimport {args.module}: {total:.1f} ms ({status} budget of {args.budget_ms:.0f} ms)")
+    return 0 if total <= args.budget_ms else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
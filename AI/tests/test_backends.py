@@ -0,0 +1,126 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+from backends import Backend, Router, openai_complete
+from classifier import UpstreamError
+from resilience import CircuitBreaker, TokenBucket, UpstreamGuard
+
+
+def make_backend(name, complete, failure_threshold=1, reset_timeout=0.05):
+    guard = UpstreamGuard(TokenBucket(1000, 1000), CircuitBreaker(failure_threshold, reset_timeout), max_attempts=1)
+    return Backend(name, complete, guard)
+
+
+def answering(content, delay=0.0):
+    def complete(prompt):
+        time.sleep(delay)
+        return content
+    return complete
+
+
+def failing(prompt):
+    raise UpstreamError("upstream failed", status=503)
+
+
+def test_order_prefers_measured_faster_backend():
+    slow, fast = make_backend("slow", answering("High")), make_backend("fast", answering("High"))
+    router = Router([slow, fast])
+    assert [b.name for b in router.order()] == ["slow", "fast"]
+    slow.observe(0.5)
+    fast.observe(0.1)
+    assert [b.name for b in router.order()] == ["fast", "slow"]
+
+
+def test_open_backend_is_skipped_until_reset_timeout_then_probed_first():
+    state = {"down": True}
+
+    def primary(prompt):
+        if state["down"]:
+            raise UpstreamError("upstream failed", status=503)
+        return "High"
+
+    router = Router([make_backend("primary", primary), make_backend("secondary", answering("Low"))])
+    assert router.call("prompt") == "Low"
+    assert [b.name for b in router.order()] == ["secondary"]
+
+    state["down"] = False
+    time.sleep(0.06)
+    assert [b.name for b in router.order()] == ["primary", "secondary"]
+    assert router.call("prompt") == "High"
+    assert router.backends[0].guard.breaker.stats()["state"] == "closed"
+
+
+def test_all_backends_are_tried_when_none_is_healthy():
+    first, second = make_backend("a", failing, reset_timeout=60), make_backend("b", failing, reset_timeout=60)
+    first.guard.breaker.record_failure()
+    second.guard.breaker.record_failure()
+    assert [b.name for b in Router([first, second]).order()] == ["a", "b"]
+
+
+def test_unrecognized_response_fails_over():
+    router = Router([make_backend("garbled", answering("I cannot help")), make_backend("ok", answering("Medium"))])
+    assert router.call("prompt") == "Medium"
+    assert router.backends[0].failures == 1
+
+
+def test_slow_backend_is_hedged():
+    slow, fast = make_backend("slow", answering("High", delay=0.5)), make_backend("fast", answering("Low"))
+    router = Router([slow, fast], max_delay=0.05, max_hedge_ratio=1)
+    start = time.perf_counter()
+    assert router.call("prompt") == "Low"
+    assert time.perf_counter() - start < 0.4
+    assert router.hedges == 1
+    assert fast.wins == 1
+
+
+def test_slow_backend_is_hedged_async():
+    async def slow(prompt):
+        await asyncio.sleep(0.5)
+        return "High"
+
+    async def fast(prompt):
+        return "Low"
+
+    async def failing_async(prompt):
+        raise UpstreamError("upstream failed", status=503)
+
+    router = Router([make_backend("slow", slow), make_backend("fast", fast)], max_delay=0.05, max_hedge_ratio=1)
+    assert asyncio.run(router.call_async("prompt")) == "Low"
+    assert router.hedges == 1
+
+    router = Router([make_backend("down", failing_async), make_backend("fast", fast)])
+    assert asyncio.run(router.call_async("prompt")) == "Low"
+
+
+def test_hedges_are_capped_by_budget():
+    backends = [make_backend(name, answering("High", delay=0.03)) for name in ("a", "b")]
+    router = Router(backends, max_delay=0.01, max_hedge_ratio=0.25)
+    assert [router.call("prompt") for _ in range(8)] == ["High"] * 8
+    assert router.hedges == 2
+    assert router.hedges_skipped == 6
+
+
+def test_waiting_for_a_pool_worker_does_not_trigger_hedges():
+    router = Router([make_backend("a", answering("High", delay=0.03)), make_backend("b", answering("High", delay=0.03))],
+                    max_delay=0.05, pool_size=4, max_hedge_ratio=1)
+    with ThreadPoolExecutor(max_workers=20) as callers:
+        assert list(callers.map(lambda i: router.call("prompt"), range(20))) == ["High"] * 20
+    assert router.hedges == 0
+
+
+@pytest.mark.parametrize("body", [b"<html>bad gateway</html>", b'{"choices": []}', b'{"choices": [{"message": null}]}', b"[]"])
+def test_malformed_success_body_is_an_upstream_error(body):
+    client = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(200, content=body)))
+    complete = openai_complete("test", client, "http://upstream/v1/chat/completions", "model")
+    with pytest.raises(UpstreamError):
+        complete("prompt")
+
+
+def test_well_formed_body_returns_content():
+    body = {"choices": [{"message": {"content": "high"}}]}
+    client = httpx.Client(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=body)))
+    assert openai_complete("test", client, "http://upstream/v1/chat/completions", "model")("prompt") == "high"
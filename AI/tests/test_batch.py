@@ -0,0 +1,33 @@
+from classifier import classify_batch
+from flask_app import create_app
+from service import BATCH_MAX_ITEMS, Service
+from singleflight import SingleFlight
+
+
+def test_results_keep_input_order_and_isolate_failures():
+    def classify_one(description):
+        if description == "boom":
+            raise ValueError("upstream exploded")
+        return {"priority": description}
+
+    results = classify_batch(["high", "boom", "", "low"], classify_one, max_workers=3)
+    assert results == [
+        {"index": 0, "priority": "high"},
+        {"index": 1, "error": "upstream exploded"},
+        {"index": 2, "error": "No description provided"},
+        {"index": 3, "priority": "low"},
+    ]
+
+
+def test_batch_endpoint_summarises_and_bounds_requests():
+    client = create_app(Service(SingleFlight()), dict).test_client()
+
+    response = client.post("/classify/batch", json={"incidentDescriptions": ["A man was murdered and another killed.", 7]})
+    assert response.status_code == 200
+    assert response.json["succeeded"] == 1
+    assert response.json["failed"] == 1
+    assert response.json["results"][0]["priority"] == "high"
+
+    assert client.post("/classify/batch", json={"incidentDescriptions": []}).status_code == 400
+    oversized = {"incidentDescriptions": ["theft"] * (BATCH_MAX_ITEMS + 1)}
+    assert client.post("/classify/batch", json=oversized).status_code == 413
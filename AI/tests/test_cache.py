@@ -0,0 +1,42 @@
+import time
+
+from cache import ClassificationCache, make_key
+
+
+def test_key_ignores_whitespace_and_case_but_not_model():
+    assert make_key("Theft  at the Market", "m", "v1") == make_key("theft at the market ", "m", "v1")
+    assert make_key("theft", "m", "v1") != make_key("theft", "other", "v1")
+    assert make_key("theft", "m", "v1") != make_key("theft", "m", "v2")
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ClassificationCache(max_entries=2)
+    cache.set("a", {"priority": "low"})
+    cache.set("b", {"priority": "high"})
+    cache.get("a")
+    cache.set("c", {"priority": "medium"})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"priority": "low"}
+
+
+def test_expired_entry_is_a_miss():
+    cache = ClassificationCache(ttl_seconds=0.01)
+    cache.set("a", {"priority": "low"})
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_writes_reach_sqlite_in_the_background(tmp_path):
+    path = str(tmp_path / "cache.db")
+    cache = ClassificationCache(db_path=path)
+    for i in range(50):
+        cache.set(f"k{i}", {"priority": "high", "tier": "llm"})
+    cache.flush()
+    assert cache.stats()["pending_writes"] == 0
+
+    reopened = ClassificationCache(db_path=path)
+    assert reopened.get("k7") == {"priority": "high", "tier": "llm"}
+    assert reopened.stats()["disk_hits"] == 1
+    assert reopened.preload() == 50
+
@@ -0,0 +1,41 @@
+from classifier import classify
+from fast_path import KeywordClassifier
+
+
+def test_repeated_keywords_from_one_category_are_confident():
+    classifier = KeywordClassifier()
+    priority, confidence = classifier.classify("He was stabbed and later murdered by the gang.")
+    assert priority == "high"
+    assert classifier.is_confident(priority, confidence)
+
+
+def test_single_keyword_is_not_confident():
+    classifier = KeywordClassifier()
+    assert classifier.classify("My bicycle was stolen from the market.") == ("medium", 0.8)
+    assert not classifier.is_confident("medium", 0.8)
+
+
+def test_mixed_categories_are_not_confident():
+    priority, confidence = KeywordClassifier().classify("Thieves stole my phone and killed my dog.")
+    assert priority == "medium"
+    assert confidence < 0.5
+
+
+def test_low_is_never_answered_locally():
+    classifier = KeywordClassifier()
+    priority, confidence = classifier.classify("Loud music and littering by a noisy neighbour, a real nuisance.")
+    assert priority == "low"
+    assert not classifier.is_confident(priority, confidence)
+
+
+def test_bare_minor_words_do_not_match():
+    assert KeywordClassifier().classify("I lost consciousness after the noise of the blast.") == ("low", 0.0)
+
+
+def test_confident_match_skips_the_upstream_call():
+    def complete(prompt):
+        raise AssertionError("fast path should have answered")
+
+    result = classify("Armed robbers robbed the bank; the robbery lasted an hour.", complete,
+                      fast_path=KeywordClassifier())
+    assert result == {"priority": "medium", "tier": "fast_path", "confidence": 0.97}
@@ -0,0 +1,62 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from jobs import JobQueue
+
+
+def wait_for(queue, job_id):
+    deadline = time.monotonic() + 2
+    while time.monotonic() < deadline:
+        job = queue.get(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+def test_fir_id_reaches_the_classifier():
+    queue = JobQueue(lambda description, fir_id: {"priority": "low", "firId": fir_id}, workers=1)
+    job = queue.submit("a description", fir_id="FIR-7")
+    assert wait_for(queue, job["id"])["result"] == {"priority": "low", "firId": "FIR-7"}
+
+
+def test_callbacks_need_an_allowlisted_http_host():
+    queue = JobQueue(lambda description, fir_id: {}, allowed_callback_hosts={"hooks.example.org"})
+    assert queue.check_callback_url("https://hooks.example.org/fir") is None
+    assert queue.check_callback_url("http://169.254.169.254/latest") == "callbackUrl host is not allowed"
+    assert queue.check_callback_url("file:///etc/passwd") == "callbackUrl must be an http(s) URL"
+
+
+def test_callbacks_are_refused_without_an_allowlist():
+    queue = JobQueue(lambda description, fir_id: {})
+    assert "JOB_CALLBACK_ALLOWED_HOSTS" in queue.check_callback_url("https://hooks.example.org/fir")
+
+
+def test_callback_redirects_are_not_followed():
+    received = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            received.append(self.path)
+            self.send_response(307)
+            self.send_header("Location", "/internal")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        queue = JobQueue(lambda description, fir_id: {"priority": "low"}, workers=1, callback_attempts=1,
+                         allowed_callback_hosts={"127.0.0.1"})
+        job = queue.submit("a description", f"http://127.0.0.1:{server.server_port}/hook")
+        wait_for(queue, job["id"])
+        deadline = time.monotonic() + 2
+        while queue.stats()["callbacks_failed"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        server.shutdown()
+    assert received == ["/hook"]
+    assert queue.stats()["callbacks_failed"] == 1
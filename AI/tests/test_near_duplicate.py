@@ -0,0 +1,87 @@
+from cache import ClassificationCache
+from classifier import classify
+from near_duplicate import NearDuplicateIndex
+
+BASE = ("Yesterday at around 9 pm our neighbour came to our house and argued with my father about the "
+        "boundary wall between our plots in Sector 12. He was very angry and shouted at everyone present.")
+
+
+def indexed(**options):
+    index = NearDuplicateIndex(**options)
+    index.record(index.lookup(BASE), "low", "FIR-1")
+    return index
+
+
+def test_identical_description_reuses_priority():
+    match = indexed().lookup(BASE)
+    assert match.priority == "low"
+    assert match.similarity == 1.0
+    assert match.duplicates == ["FIR-1"]
+
+
+def test_changed_severity_term_only_reports_duplicate():
+    match = indexed().lookup(BASE.replace("argued with", "shot"))
+    assert match.entry_id is not None
+    assert match.priority is None
+    assert match.duplicates == ["FIR-1"]
+
+
+def test_unrelated_description_does_not_match():
+    match = indexed().lookup("My phone was stolen from my bag at the vegetable market this morning.")
+    assert match.entry_id is None
+    assert match.duplicates == []
+
+
+def test_untrusted_answer_links_fir_id_without_indexing():
+    index = indexed()
+    index.record(index.lookup(BASE.replace("argued with", "shot")), None, "FIR-2")
+    assert index.stats()["entries"] == 1
+    assert index.lookup(BASE).duplicates == ["FIR-2", "FIR-1"]
+
+
+def test_entries_persist_and_reload(tmp_path):
+    db_path = str(tmp_path / "near_duplicates.db")
+    indexed(db_path=db_path).flush()
+
+    reloaded = NearDuplicateIndex(db_path=db_path)
+    match = reloaded.lookup(BASE)
+    assert match.priority == "low"
+    assert match.duplicates == ["FIR-1"]
+
+
+def test_oldest_entries_are_evicted():
+    index = NearDuplicateIndex(max_entries=2)
+    for i, text in enumerate(["a cow blocked the road", "loud music at the wedding hall", "a stray dog bit a boy"]):
+        index.record(index.lookup(text), "low", f"FIR-{i}")
+    assert index.stats()["entries"] == 2
+    assert index.lookup("a cow blocked the road").entry_id is None
+
+
+def test_evictions_and_fir_ids_are_persisted(tmp_path):
+    db_path = str(tmp_path / "near_duplicates.db")
+    index = NearDuplicateIndex(max_entries=2, db_path=db_path)
+    for i, text in enumerate(["a cow blocked the road", "loud music at the wedding hall", "a stray dog bit a boy"]):
+        index.record(index.lookup(text), "low", f"FIR-{i}")
+    index.record(index.lookup("a stray dog bit a boy"), "low", "FIR-3")
+    index.flush()
+
+    reloaded = NearDuplicateIndex(max_entries=2, db_path=db_path)
+    reloaded.load()
+    assert reloaded.stats()["entries"] == 2
+    assert reloaded.lookup("a stray dog bit a boy").duplicates == ["FIR-3", "FIR-2"]
+
+
+def test_only_answers_from_the_index_count_as_reuses():
+    index, cache, prompts = NearDuplicateIndex(), ClassificationCache(), []
+
+    def complete(prompt):
+        prompts.append(prompt)
+        return "low"
+
+    assert classify(BASE, complete, cache=cache, index=index)["tier"] == "llm"
+    assert classify(BASE, complete, cache=cache, index=index)["tier"] == "cache"
+    assert index.stats()["reuses"] == 0
+
+    assert classify(BASE + " Please help.", complete, cache=cache, index=index)["tier"] == "near_duplicate"
+    assert len(prompts) == 1
+    assert index.stats()["reuses"] == 1
@@ -0,0 +1,68 @@
+import pytest
+
+from preprocess import DescriptionPreprocessor, count_tokens, normalize, strip_boilerplate, truncate_tokens
+
+LETTER = (
+    "To,\nThe SHO,\nKotwali Police Station, Jaipur\nDate: 12/03/2024\nPlace: Jaipur\nRespected Sir,\n"
+    "My bike was stolen from outside my house. I request you to take necessary action against the thieves.\n"
+    "Yours faithfully,\nRamesh\n9876543210"
+)
+
+
+def clean(text):
+    return strip_boilerplate(normalize(text))
+
+
+def test_letter_header_and_sign_off_are_stripped():
+    assert clean(LETTER) == "My bike was stolen from outside my house."
+
+
+@pytest.mark.parametrize("text", [
+    "SHO Sharma stabbed my brother with a knife.",
+    "The officer in charge of the shop was stabbed.",
+    "Date: today he stabbed my brother",
+    "Place: near the temple gate two men attacked us with rods",
+    "I went to the police station",
+])
+def test_lines_that_report_the_incident_are_kept(text):
+    assert clean(text) == text
+
+
+def test_incident_line_after_a_title_survives_in_context():
+    text = "I went to the police station yesterday.\nSHO Sharma stabbed my brother with a knife.\nPlease help."
+    assert "stabbed my brother" in clean(text)
+
+
+def test_contact_details_are_removed_but_dates_kept():
+    text = "On 12-03-2024 my purse was snatched. Call me on +91 98765 43210 or mail ramesh@example.com."
+    assert clean(text) == "On 12-03-2024 my purse was snatched. Call me on or mail"
+
+
+def test_normalize_repairs_mojibake_and_drops_invisible_characters():
+    assert normalize("I don\u00e2\u20ac\u2122t know\u200b who did it") == "I don't know who did it"
+    assert normalize("\u201cHe ran\u201d \u2013 then\u2026") == '"He ran" - then...'
+
+
+def test_truncate_tokens_stays_within_budget():
+    text = "word " * 100
+    truncated = truncate_tokens(text, 10)
+    assert count_tokens(truncated) <= 10
+    assert text.startswith(truncated)
+
+
+def test_over_budget_description_keeps_severity_sentences():
+    filler = " ".join(f"The weather on day {i} was pleasant and the market was busy." for i in range(40))
+    description = f"{filler} Then a man stabbed my brother near the gate. {filler}"
+    prepared = DescriptionPreprocessor(max_tokens=60).prepare(description)
+    assert prepared.method == "extract"
+    assert prepared.tokens <= 60
+    assert "stabbed my brother" in prepared.text
+    assert prepared.original_tokens > prepared.tokens
+
+
+def test_truncate_mode_and_short_descriptions():
+    preprocessor = DescriptionPreprocessor(max_tokens=5, over_budget="truncate")
+    assert preprocessor.prepare("one two three four five six seven").text == "one two three four five"
+    assert DescriptionPreprocessor().prepare("My phone was stolen.").method is None
+    with pytest.raises(ValueError):
+        DescriptionPreprocessor(over_budget="summarize")
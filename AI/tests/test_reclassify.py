@@ -0,0 +1,61 @@
+import io
+import json
+
+import pytest
+
+from reclassify import UnscoredError, load_checkpoint, reclassify
+
+
+def records(count):
+    return [json.dumps({"id": i, "incidentDescription": f"incident {i}"}) + "\n" for i in range(count)]
+
+
+def test_results_are_written_in_input_order_with_errors_inline():
+    lines = records(3) + ["not json\n"]
+    out = io.StringIO()
+    state = reclassify(lines, out, lambda d: {"priority": "medium", "tier": "llm"}, batch_size=2)
+
+    outputs = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [o.get("id") for o in outputs[:3]] == [0, 1, 2]
+    assert all(o["severity"] == 2 for o in outputs[:3])
+    assert "Invalid JSON" in outputs[3]["error"]
+    assert state["input_lines"] == 4
+
+
+def test_resume_continues_after_checkpoint(tmp_path):
+    output, checkpoint = tmp_path / "out.ndjson", str(tmp_path / "out.ckpt")
+    lines = records(4)
+
+    def flaky(description):
+        if description == "incident 2":
+            return {"priority": "low", "tier": "fallback"}
+        return {"priority": "high", "tier": "llm"}
+
+    with open(output, "w") as out, pytest.raises(UnscoredError):
+        reclassify(lines, out, flaky, batch_size=2, checkpoint=checkpoint, retries=0)
+    state = load_checkpoint(checkpoint)
+    assert state["input_lines"] == 2
+    assert len(output.read_text().splitlines()) == 2
+
+    with open(output, "a+") as out:
+        out.truncate(state["output_bytes"])
+        reclassify(lines[state["input_lines"]:], out, lambda d: {"priority": "high", "tier": "llm"},
+                   batch_size=2, checkpoint=checkpoint, state=state)
+    outputs = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [o["id"] for o in outputs] == [0, 1, 2, 3]
+    assert all(o["tier"] == "llm" for o in outputs)
+
+
+def test_fallback_answers_are_retried(monkeypatch):
+    monkeypatch.setattr("reclassify.time.sleep", lambda seconds: None)
+    attempts = {}
+
+    def recovering(description):
+        attempts[description] = attempts.get(description, 0) + 1
+        if attempts[description] == 1:
+            return {"priority": "low", "tier": "fallback"}
+        return {"priority": "high", "tier": "llm"}
+
+    out = io.StringIO()
+    reclassify(records(2), out, recovering, retries=1)
+    assert [json.loads(line)["tier"] for line in out.getvalue().splitlines()] == ["llm", "llm"]
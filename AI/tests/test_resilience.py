@@ -0,0 +1,104 @@
+import time
+
+import pytest
+
+from classifier import UpstreamError
+from resilience import CircuitBreaker, CircuitOpenError, RateLimitedError, TokenBucket, UpstreamGuard
+
+
+def make_guard(failure_threshold=2, reset_timeout=0.05, max_attempts=3, rate=1000, capacity=1000):
+    return UpstreamGuard(TokenBucket(rate, capacity), CircuitBreaker(failure_threshold, reset_timeout),
+                         max_attempts=max_attempts, backoff_base=0.001, backoff_cap=0.01, max_wait=0.01)
+
+
+def failing(status=503):
+    def complete(prompt):
+        raise UpstreamError("upstream failed", status=status)
+    return complete
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.stats()["state"] == "open"
+    assert not breaker.allow()
+    assert not breaker.available()
+
+
+def test_breaker_lets_one_probe_through_after_reset_timeout():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.record_failure()
+    assert not breaker.available()
+    time.sleep(0.06)
+
+    assert breaker.available()
+    assert breaker.allow()
+    assert breaker.stats()["state"] == "half_open"
+    assert not breaker.available()
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.stats() == {"state": "closed", "consecutive_failures": 0}
+
+
+def test_failed_probe_reopens_breaker():
+    breaker = CircuitBreaker(failure_threshold=5, reset_timeout=0.05)
+    for _ in range(5):
+        breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.stats()["state"] == "open"
+    assert not breaker.available()
+
+
+def test_guard_retries_retryable_errors():
+    attempts = []
+
+    def complete(prompt):
+        attempts.append(prompt)
+        if len(attempts) < 3:
+            raise UpstreamError("busy", status=503)
+        return "High"
+
+    guard = make_guard(failure_threshold=5)
+    assert guard.call(complete, "prompt") == "High"
+    assert len(attempts) == 3
+    assert guard.retries == 2
+    assert guard.breaker.stats()["state"] == "closed"
+
+
+def test_guard_does_not_retry_client_errors():
+    guard = make_guard()
+    with pytest.raises(UpstreamError):
+        guard.call(failing(status=400), "prompt")
+    assert guard.retries == 0
+    assert guard.breaker.stats()["consecutive_failures"] == 0
+
+
+def test_guard_fails_fast_while_breaker_is_open():
+    guard = make_guard(failure_threshold=2, max_attempts=2)
+    with pytest.raises(UpstreamError):
+        guard.call(failing(), "prompt")
+    with pytest.raises(CircuitOpenError):
+        guard.call(lambda prompt: "High", "prompt")
+
+
+def test_guard_rejects_when_limiter_is_exhausted():
+    guard = make_guard(rate=0.01, capacity=1)
+    assert guard.call(lambda prompt: "Low", "prompt") == "Low"
+    with pytest.raises(RateLimitedError):
+        guard.call(lambda prompt: "Low", "prompt")
+
+
+def test_token_bucket_halves_rate_when_throttled():
+    bucket = TokenBucket(rate=8, capacity=1, min_rate=1)
+    bucket.on_throttled()
+    assert bucket.rate == 4
+    for _ in range(5):
+        bucket.on_throttled()
+    assert bucket.rate == 1
+    bucket.on_success()
+    assert bucket.rate > 1
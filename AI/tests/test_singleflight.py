@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from singleflight import AsyncSingleFlight, SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight, calls, results = SingleFlight(), [], []
+
+    def fn():
+        calls.append(1)
+        time.sleep(0.1)
+        return "high"
+
+    threads = [threading.Thread(target=lambda: results.append(flight.do("key", fn))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(results) == [("high", False)] + [("high", True)] * 4
+    assert flight.stats() == {"in_flight": 0, "coalesced": 4}
+
+
+def test_waiters_receive_the_leaders_error():
+    flight, errors = SingleFlight(), []
+    started = threading.Event()
+
+    def fn():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("boom")
+
+    def run():
+        try:
+            flight.do("key", fn)
+        except ValueError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=run)
+    leader.start()
+    started.wait()
+    waiter = threading.Thread(target=run)
+    waiter.start()
+    leader.join()
+    waiter.join()
+    assert len(errors) == 2
+
+
+def test_async_calls_share_one_execution():
+    flight, calls = AsyncSingleFlight(), []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "medium"
+
+    async def main():
+        return await asyncio.gather(*(flight.do("key", fn) for _ in range(3)))
+
+    assert asyncio.run(main()) == [("medium", False), ("medium", True), ("medium", True)]
+    assert len(calls) == 1
+
+
+def test_waiter_takes_over_when_async_leader_is_cancelled():
+    flight, calls = AsyncSingleFlight(), []
+
+    async def fn():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "low"
+
+    async def main():
+        leader = asyncio.create_task(flight.do("key", fn))
+        await asyncio.sleep(0.01)
+        waiters = [asyncio.create_task(flight.do("key", fn)) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await asyncio.gather(*waiters)
+
+    results = asyncio.run(main())
+    assert [priority for priority, _ in results] == ["low", "low"]
+    assert len(calls) == 2
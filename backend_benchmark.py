@@ -0,0 +1,217 @@
+import argparse
+import json
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+
+from mock_services import LocalAIService, MockServices
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, wall_time):
+    latencies = sorted(s["latency"] for s in samples)
+    statuses = {}
+    for s in samples:
+        statuses[str(s["status"])] = statuses.get(str(s["status"]), 0) + 1
+    errors = sum(1 for s in samples if s["error"] or s["status"] >= 400)
+
+    def ms(value):
+        return round(value * 1000, 2) if value is not None else None
+
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "statuses": statuses,
+        "throughput_rps": round(len(samples) / wall_time, 2) if wall_time else None,
+        "latency_ms": {
+            "min": ms(latencies[0]) if latencies else None,
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else None,
+            "p50": ms(percentile(latencies, 0.50)),
+            "p95": ms(percentile(latencies, 0.95)),
+            "p99": ms(percentile(latencies, 0.99)),
+            "max": ms(latencies[-1]) if latencies else None,
+        },
+    }
+
+
+class JusticeChainBenchmark:
+    def __init__(self, ai_url="http://localhost:5050", blockchain_url="http://localhost:4000",
+                 concurrency=8, rate=0, requests_per_endpoint=200, timeout=30):
+        self.ai_url = ai_url
+        self.blockchain_url = blockchain_url
+        self.concurrency = concurrency
+        self.rate = rate
+        self.requests_per_endpoint = requests_per_endpoint
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def session(self):
+        # One keep-alive session per worker thread
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def send(self, method, url, data=None):
+        start = time.perf_counter()
+        try:
+            if method == 'GET':
+                response = self.session().get(url, timeout=self.timeout)
+            else:
+                response = self.session().post(url, json=data, timeout=self.timeout)
+            return {"status": response.status_code, "error": None, "latency": time.perf_counter() - start}
+        except Exception as e:
+            return {"status": 0, "error": str(e), "latency": time.perf_counter() - start}
+
+    def run_endpoint(self, name, make_request):
+        """Drive one endpoint and return its summary.
+
+        `make_request(i)` returns (method, url, data) for the i-th request.
+        With a target rate, requests are scheduled open-loop and latency is
+        measured from the scheduled send time, so queueing delay counts.
+        """
+        print(f"\n🔍 Benchmarking {name}...")
+        samples = []
+        start = time.perf_counter()
+
+        def task(i):
+            scheduled = start + i / self.rate if self.rate else None
+            if scheduled is not None:
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            sample = self.send(*make_request(i))
+            if scheduled is not None:
+                sample["latency"] = time.perf_counter() - scheduled
+            return sample
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            samples = list(pool.map(task, range(self.requests_per_endpoint)))
+
+        summary = summarize(samples, time.perf_counter() - start)
+        latency = summary["latency_ms"]
+        print(f"  {summary['requests']} requests, {summary['errors']} errors, "
+              f"{summary['throughput_rps']} req/s, p50 {latency['p50']} ms, "
+              f"p95 {latency['p95']} ms, p99 {latency['p99']} ms")
+        return summary
+
+    def discover_fir(self):
+        """Pick a FIR to use for lookups, like backend_test.py does."""
+        try:
+            response = requests.get(f"{self.blockchain_url}/api/getAllFIRs", timeout=self.timeout)
+            firs = response.json().get("data") or []
+        except Exception as e:
+            print(f"Could not fetch FIRs for lookups: {e}")
+            firs = []
+        if firs:
+            return firs[0]
+        return {"id": "1", "firNumber": "FIR2025"}
+
+    def run(self, endpoints):
+        fir = self.discover_fir()
+        descriptions = [
+            "Someone stole my phone and wallet",
+            "A man was attacked with a knife and seriously injured",
+            "My neighbours play loud music every night",
+            "I received a phishing call and lost money from my account",
+        ]
+        scenarios = {
+            "classify": lambda i: ('POST', f"{self.ai_url}/classify",
+                                   {"incidentDescription": f"{descriptions[i % len(descriptions)]} #{i}"}),
+            "getAllFIRs": lambda i: ('GET', f"{self.blockchain_url}/api/getAllFIRs", None),
+            "searchFIR": lambda i: ('POST', f"{self.blockchain_url}/api/searchFIR",
+                                    {"searchType": "fir", "searchValue": fir.get("firNumber", "FIR2025")}),
+            "getFIR": lambda i: ('GET', f"{self.blockchain_url}/api/getFIR/{fir.get('id', '1')}", None),
+        }
+        return {name: self.run_endpoint(name, scenarios[name]) for name in endpoints}
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True,
+                                       stderr=subprocess.DEVNULL).strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the JusticeChain classification and FIR APIs")
+    parser.add_argument("--ai-url", default="http://localhost:5050")
+    parser.add_argument("--blockchain-url", default="http://localhost:4000")
+    parser.add_argument("--mock", action="store_true",
+                        help="run the real AI service against a local LLM stub, and a local blockchain "
+                             "backend stand-in")
+    parser.add_argument("--endpoints", default="classify,getAllFIRs,searchFIR,getFIR",
+                        help="comma-separated subset of classify,getAllFIRs,searchFIR,getFIR")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=0,
+                        help="target requests/second per endpoint (0 = as fast as concurrency allows)")
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--mock-firs", type=int, default=50)
+    parser.add_argument("--mock-ipfs-latency-ms", type=float, default=2)
+    parser.add_argument("--mock-llm-latency-ms", type=float, default=50)
+    parser.add_argument("--output", default="benchmark_report.json")
+    args = parser.parse_args()
+
+    endpoints = [e.strip() for e in args.endpoints.split(",") if e.strip()]
+    mock = ai_service = None
+    if args.mock:
+        mock = MockServices(fir_count=args.mock_firs, ipfs_latency=args.mock_ipfs_latency_ms / 1000).start()
+        args.blockchain_url = mock.url
+        print(f"Using mock blockchain backend at {mock.url}")
+        if "classify" in endpoints:
+            try:
+                ai_service = LocalAIService(llm_latency=args.mock_llm_latency_ms / 1000).start()
+            except Exception:
+                mock.stop()
+                raise
+            args.ai_url = ai_service.url
+            print(f"Using AI service at {ai_service.url} with a mock LLM provider")
+
+    print(f"Using AI URL: {args.ai_url}")
+    print(f"Using Blockchain Backend URL: {args.blockchain_url}")
+
+    benchmark = JusticeChainBenchmark(args.ai_url, args.blockchain_url, concurrency=args.concurrency,
+                                      rate=args.rate, requests_per_endpoint=args.requests)
+    try:
+        results = benchmark.run(endpoints)
+    finally:
+        if mock is not None:
+            mock.stop()
+        if ai_service is not None:
+            ai_service.stop()
+
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "config": {
+            "ai_url": args.ai_url,
+            "blockchain_url": args.blockchain_url,
+            "mock": args.mock,
+            "mock_llm_latency_ms": args.mock_llm_latency_ms if args.mock else None,
+            "concurrency": args.concurrency,
+            "rate": args.rate,
+            "requests_per_endpoint": args.requests,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📊 Report written to {args.output}")
+
+    return 0 if all(r["errors"] == 0 for r in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""Offline stand-ins for the blockchain backend and the AI service's LLM provider.
+
+MockServices serves the same /api/getAllFIRs, /api/getFIR/:id and
+/api/searchFIR contracts as blockchainbackend/index.js from deterministic
+generated FIRs; each FIR "fetched from IPFS" costs `ipfs_latency` seconds.
+LocalAIService runs the real AI service (AI/connect.py) with its provider
+pointed at AI/mock_upstream.py, which answers after `llm_latency` seconds,
+so the relative cost of the real endpoints is preserved without network.
+"""
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+AI_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "AI")
+
+SAMPLE_INCIDENTS = [
+    ("Murder reported near railway station", 3),
+    ("Armed robbery at a jewellery shop", 2),
+    ("Mobile phone stolen on a bus", 2),
+    ("Online banking fraud", 2),
+    ("Lost wallet at the market", 1),
+    ("Noise complaint against neighbours", 1),
+]
+
+
+def generate_firs(count, seed=42):
+    rng = random.Random(seed)
+    year = date.today().year
+    firs = []
+    for i in range(1, count + 1):
+        title, severity = rng.choice(SAMPLE_INCIDENTS)
+        firs.append({
+            "id": str(i),
+            "firNumber": f"FIR{year}{i:06d}",
+            "blockchainId": i,
+            "title": title,
+            "description": f"{title}. Complaint number {i}.",
+            "severity": str(severity),
+            "ipfsHash": f"Qm{i:044d}",
+            "status": "Under Investigation" if severity >= 3 else "FIR Registered",
+            "email": f"citizen{i}@example.com",
+            "phone": f"98{i:08d}",
+            "idNumber": f"ID{i:08d}",
+        })
+    return firs
+
+
+class MockServices:
+    """Threaded HTTP server holding the fake FIR store; use as a context manager."""
+
+    def __init__(self, fir_count=50, ipfs_latency=0.002, host="127.0.0.1", port=0):
+        self.firs = generate_firs(fir_count)
+        self.ipfs_latency = ipfs_latency
+        self.server = ThreadingHTTPServer((host, port), self._handler_class())
+        self.server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def fetch_ipfs(self, fir):
+        time.sleep(self.ipfs_latency)
+        return fir
+
+    def search(self, search_type, search_value):
+        value = search_value.lower().strip()
+        fields = {"fir": "firNumber", "phone": "phone", "email": "email", "id": "idNumber"}
+        field = fields.get(search_type)
+        for fir in self.firs:
+            fir = self.fetch_ipfs(fir)
+            if field and value in fir[field].lower():
+                return fir
+        return None
+
+    def _handler_class(self):
+        services = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def send_json(self, status, data):
+                body = json.dumps(data).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def read_json(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                return json.loads(self.rfile.read(length) or b"{}")
+
+            def do_GET(self):
+                if self.path == "/":
+                    self.send_json(200, {"status": "mock services running"})
+                elif self.path == "/api/getAllFIRs":
+                    firs = [services.fetch_ipfs(fir) for fir in services.firs]
+                    self.send_json(200, {"success": True, "data": firs, "total": len(firs)})
+                elif self.path.startswith("/api/getFIR/"):
+                    fir_id = self.path.rsplit("/", 1)[1]
+                    fir = next((f for f in services.firs if f["id"] == fir_id), None)
+                    if fir is None:
+                        self.send_json(500, {"success": False, "message": "Error fetching FIR from blockchain"})
+                    else:
+                        self.send_json(200, {"success": True, "data": services.fetch_ipfs(fir)})
+                else:
+                    self.send_json(404, {"error": "Not found"})
+
+            def do_POST(self):
+                body = self.read_json()
+                if self.path == "/api/searchFIR":
+                    match = services.search(body.get("searchType", ""), body.get("searchValue", ""))
+                    self.send_json(200, {"success": True, "data": match})
+                else:
+                    self.send_json(404, {"error": "Not found"})
+
+        return Handler
+
+
+def free_port(host="127.0.0.1"):
+    with socket.socket() as s:
+        s.bind((host, 0))
+        return s.getsockname()[1]
+
+
+class LocalAIService:
+    """The real AI service in a subprocess, its LLM provider replaced by AI/mock_upstream.py.
+
+    Caches are in-memory so runs don't affect each other, and the upstream
+    rate limit is lifted (unless set in the environment) since the stub
+    has no quota. start() returns once the service answers GET /ready.
+    """
+
+    def __init__(self, llm_latency=0.05, server="connect.py", host="127.0.0.1", startup_timeout=60):
+        self.llm_latency = llm_latency
+        self.server = server
+        self.host = host
+        self.startup_timeout = startup_timeout
+        self.url = None
+        self._processes = []
+        self._log = None
+
+    def start(self):
+        upstream_port, port = free_port(self.host), free_port(self.host)
+        self._log = tempfile.TemporaryFile()
+        self._spawn(["mock_upstream.py", "--host", self.host, "--port", str(upstream_port),
+                     "--latency", f"fixed:{self.llm_latency}"], os.environ)
+
+        env = dict(os.environ, GROQ_BASE_URL=f"http://{self.host}:{upstream_port}", GROQ_API_KEY="mock",
+                   PORT=str(port), CACHE_DB_PATH="", NEAR_DUP_DB_PATH="")
+        env.setdefault("UPSTREAM_RATE_PER_SECOND", "1000")
+        env.setdefault("UPSTREAM_BURST", "1000")
+        self._spawn([self.server], env)
+        self.url = f"http://{self.host}:{port}"
+        self._wait_ready()
+        return self
+
+    def stop(self):
+        for process in self._processes:
+            process.terminate()
+        for process in self._processes:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        self._processes = []
+        if self._log is not None:
+            self._log.close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _spawn(self, args, env):
+        self._processes.append(subprocess.Popen([sys.executable] + args, cwd=AI_DIR, env=env,
+                                                stdout=self._log, stderr=subprocess.STDOUT))
+
+    def _wait_ready(self):
+        deadline = time.monotonic() + self.startup_timeout
+        while time.monotonic() < deadline:
+            exited = [p for p in self._processes if p.poll() is not None]
+            if exited:
+                break
+            try:
+                with urllib.request.urlopen(f"{self.url}/ready", timeout=1) as response:
+                    if response.status == 200:
+                        return
+            except OSError:
+                pass
+            time.sleep(0.1)
+        self._log.seek(0)
+        output = self._log.read().decode("utf-8", "replace")[-2000:]
+        self.stop()
+        raise RuntimeError(f"AI service did not become ready at {self.url}:\n{output}")
+
+
+if __name__ == "__main__":
+    with MockServices(port=4000) as services:
+        print(f"Mock blockchain backend on {services.url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass